@@ -0,0 +1,59 @@
+"""add collector stats
+
+Revision ID: 0a4d8e6f2b71
+Revises: f6b1a9d3e27c
+Create Date: 2026-10-18 13:55:12.480366
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a4d8e6f2b71'
+down_revision: Union[str, Sequence[str], None] = 'f6b1a9d3e27c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('collectorstats',
+    sa.Column('collector_id', sa.Uuid(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('completed_orders', sa.Integer(), nullable=False),
+    sa.Column('total_quantity', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['collector_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('collector_id')
+    )
+    # Backfill; same computation as crud.rebuild_collector_stats
+    op.execute(
+        """
+        INSERT INTO collectorstats (collector_id, rating_sum, rating_count, completed_orders, total_quantity, updated_at)
+        SELECT o.collector_id, COALESCE(r.rating_sum, 0), COALESCE(r.rating_count, 0), o.completed_orders, COALESCE(q.total_quantity, 0), now()
+        FROM (
+            SELECT collector_id, count(id) AS completed_orders FROM "order"
+            WHERE status = 'COMPLETED' AND collector_id IS NOT NULL GROUP BY collector_id
+        ) AS o
+        LEFT OUTER JOIN (
+            SELECT "order".collector_id, sum(orderitem.quantity) AS total_quantity FROM "order"
+            JOIN orderitem ON orderitem.order_id = "order".id
+            WHERE "order".status = 'COMPLETED' AND "order".collector_id IS NOT NULL GROUP BY "order".collector_id
+        ) AS q ON q.collector_id = o.collector_id
+        LEFT OUTER JOIN (
+            SELECT "order".collector_id, sum(review.rating) AS rating_sum, count(review.id) AS rating_count FROM "order"
+            JOIN review ON review.order_id = "order".id
+            WHERE "order".status = 'COMPLETED' AND "order".collector_id IS NOT NULL GROUP BY "order".collector_id
+        ) AS r ON r.collector_id = o.collector_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('collectorstats')
@@ -0,0 +1,79 @@
+"""add collector leaderboard view
+
+Revision ID: 1b7e3c5a9d42
+Revises: 0a4d8e6f2b71
+Create Date: 2026-10-18 14:31:46.175529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7e3c5a9d42'
+down_revision: Union[str, Sequence[str], None] = '0a4d8e6f2b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# One row per (time window, area, collector). Areas are 0.1° grid cells of the pickup location
+# (app.services.leaderboard.AREA_CELL_SIZE) plus 'all'; each row carries its rank for every sort order.
+LEADERBOARD_VIEW = """
+CREATE MATERIALIZED VIEW collector_leaderboard AS
+WITH completed AS (
+    SELECT
+        o.collector_id,
+        t.transaction_date AS completed_at,
+        floor(ST_X(o.location) / 0.1)::int || ':' || floor(ST_Y(o.location) / 0.1)::int AS cell,
+        (SELECT COALESCE(sum(i.quantity), 0) FROM orderitem i WHERE i.order_id = o.id) AS quantity,
+        r.rating
+    FROM "order" o
+    JOIN "transaction" t ON t.order_id = o.id
+    LEFT JOIN review r ON r.order_id = o.id
+    WHERE o.status = 'COMPLETED' AND o.collector_id IS NOT NULL AND o.location IS NOT NULL
+),
+windows (time_window, since) AS (
+    VALUES ('7d', now() - interval '7 days'), ('30d', now() - interval '30 days'), ('all', '-infinity'::timestamptz)
+),
+totals AS (
+    SELECT
+        w.time_window,
+        a.area,
+        c.collector_id,
+        count(*) AS completed_orders,
+        sum(c.quantity) AS total_quantity,
+        COALESCE(avg(c.rating), 0)::float AS average_rating,
+        count(c.rating) AS rating_count
+    FROM completed c
+    JOIN windows w ON c.completed_at >= w.since
+    CROSS JOIN LATERAL (VALUES (c.cell), ('all')) AS a (area)
+    GROUP BY w.time_window, a.area, c.collector_id
+)
+SELECT
+    totals.*,
+    u.full_name,
+    u.avt_url,
+    row_number() OVER (PARTITION BY time_window, area ORDER BY average_rating DESC, rating_count DESC, collector_id) AS rating_rank,
+    row_number() OVER (PARTITION BY time_window, area ORDER BY completed_orders DESC, collector_id) AS orders_rank,
+    row_number() OVER (PARTITION BY time_window, area ORDER BY total_quantity DESC, collector_id) AS volume_rank
+FROM totals
+JOIN "user" u ON u.id = totals.collector_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(LEADERBOARD_VIEW)
+    # The unique index is required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.create_index('ux_collector_leaderboard', 'collector_leaderboard', ['time_window', 'area', 'collector_id'], unique=True)
+    op.create_index('ix_collector_leaderboard_rating_rank', 'collector_leaderboard', ['time_window', 'area', 'rating_rank'], unique=False)
+    op.create_index('ix_collector_leaderboard_orders_rank', 'collector_leaderboard', ['time_window', 'area', 'orders_rank'], unique=False)
+    op.create_index('ix_collector_leaderboard_volume_rank', 'collector_leaderboard', ['time_window', 'area', 'volume_rank'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW collector_leaderboard")
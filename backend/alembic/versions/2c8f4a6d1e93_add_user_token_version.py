@@ -0,0 +1,29 @@
+"""add user token version
+
+Revision ID: 2c8f4a6d1e93
+Revises: 1b7e3c5a9d42
+Create Date: 2026-10-18 16:12:40.271593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c8f4a6d1e93'
+down_revision: Union[str, Sequence[str], None] = '1b7e3c5a9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'token_version')
@@ -0,0 +1,31 @@
+"""add order keyset pagination indexes
+
+Revision ID: 6d1abfbb6827
+Revises: 1c7c02c6e0a5
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1abfbb6827'
+down_revision: Union[str, Sequence[str], None] = '1c7c02c6e0a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_order_owner_id_created_at_id', 'order', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_order_collector_id_created_at_id', 'order', ['collector_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_collector_id_created_at_id', table_name='order')
+    op.drop_index('ix_order_owner_id_created_at_id', table_name='order')
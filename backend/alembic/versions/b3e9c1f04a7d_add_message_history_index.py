@@ -0,0 +1,29 @@
+"""add message history index
+
+Revision ID: b3e9c1f04a7d
+Revises: 6d1abfbb6827
+Create Date: 2026-10-18 10:03:17.552109
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9c1f04a7d'
+down_revision: Union[str, Sequence[str], None] = '6d1abfbb6827'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_message_conversation_id_created_at_id', 'message', ['conversation_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_message_conversation_id_created_at_id', table_name='message')
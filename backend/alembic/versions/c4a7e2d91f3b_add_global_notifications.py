@@ -0,0 +1,31 @@
+"""add global notifications
+
+Revision ID: c4a7e2d91f3b
+Revises: b3e9c1f04a7d
+Create Date: 2026-10-18 11:20:41.308215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d91f3b'
+down_revision: Union[str, Sequence[str], None] = 'b3e9c1f04a7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notification', sa.Column('is_global', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('noti_user', sa.Column('is_dismissed', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('noti_user', 'is_dismissed')
+    op.drop_column('notification', 'is_global')
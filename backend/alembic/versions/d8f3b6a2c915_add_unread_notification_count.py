@@ -0,0 +1,42 @@
+"""add unread notification count
+
+Revision ID: d8f3b6a2c915
+Revises: c4a7e2d91f3b
+Create Date: 2026-10-18 12:02:55.614093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b6a2c915'
+down_revision: Union[str, Sequence[str], None] = 'c4a7e2d91f3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('unread_notification_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE "user" SET unread_notification_count = unread.count
+        FROM (
+            SELECT user_id, count(*) AS count FROM noti_user
+            WHERE NOT is_read AND NOT is_dismissed
+            GROUP BY user_id
+        ) AS unread
+        WHERE "user".id = unread.user_id
+        """
+    )
+    op.create_index('ix_noti_user_user_id_created_at', 'noti_user', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_noti_user_user_id_created_at', table_name='noti_user')
+    op.drop_column('user', 'unread_notification_count')
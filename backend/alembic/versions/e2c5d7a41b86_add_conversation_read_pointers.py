@@ -0,0 +1,43 @@
+"""add conversation read pointers
+
+Revision ID: e2c5d7a41b86
+Revises: d8f3b6a2c915
+Create Date: 2026-10-18 12:48:09.227431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c5d7a41b86'
+down_revision: Union[str, Sequence[str], None] = 'd8f3b6a2c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversationmember', sa.Column('last_read_message_id', sa.Uuid(), nullable=True))
+    op.add_column('conversationmember', sa.Column('last_read_at', sa.DateTime(), nullable=True))
+    op.create_foreign_key(
+        'conversationmember_last_read_message_id_fkey', 'conversationmember', 'message', ['last_read_message_id'], ['id']
+    )
+    # unread_count was never maintained: start every existing member as caught up.
+    op.execute(
+        """
+        UPDATE conversationmember SET last_read_message_id = conversation.last_message_id, last_read_at = now(), unread_count = 0
+        FROM conversation
+        WHERE conversation.id = conversationmember.conversation_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('conversationmember_last_read_message_id_fkey', 'conversationmember', type_='foreignkey')
+    op.drop_column('conversationmember', 'last_read_at')
+    op.drop_column('conversationmember', 'last_read_message_id')
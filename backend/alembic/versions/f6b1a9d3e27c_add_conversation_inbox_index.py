@@ -0,0 +1,31 @@
+"""add conversation inbox index
+
+Revision ID: f6b1a9d3e27c
+Revises: e2c5d7a41b86
+Create Date: 2026-10-18 13:21:37.902146
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b1a9d3e27c'
+down_revision: Union[str, Sequence[str], None] = 'e2c5d7a41b86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_conversationmember_user_id', 'conversationmember', ['user_id'], unique=False)
+    op.create_index('ix_conversation_updated_at_id', 'conversation', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversation_updated_at_id', table_name='conversation')
+    op.drop_index('ix_conversationmember_user_id', table_name='conversationmember')
@@ -1,20 +1,23 @@
-from collections.abc import Generator
+import uuid
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated,Tuple
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import engine, async_engine, read_engine, async_read_engine
 from app.models import User
-from app.schemas.auth import TokenPayLoad
+from app.schemas.auth import AuthUser, TokenPayLoad
 from app.schemas.user import UserPublic
 from app.models import UserRole
+from app.services import auth_cache
 from fastapi import WebSocket, Query
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_STR}/auth/login/access-token")
@@ -23,41 +26,80 @@ def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session for read-only handlers: the replica, unless the user wrote recently
+    (see the route_reads_after_writes middleware in app/main.py).
+    """
+    bind = engine if getattr(request.state, "read_from_primary", False) else read_engine
+    with Session(bind) as session:
+        yield session
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    bind = async_engine if getattr(request.state, "read_from_primary", False) else async_read_engine
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        yield session
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def authenticate_token(session: Session, token: str) -> AuthUser:
+    """
+    Decode the access token and return the caller's id and role.
+    The user row is only loaded on an auth cache miss; a token whose "ver" claim is not the
+    user's current token version (password or role changed since) is rejected.
+    """
     try: 
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
         token_data = TokenPayLoad(**payload)
-    except (InvalidTokenError, ValidationError):
+        user_id = uuid.UUID(token_data.sub)
+    except (InvalidTokenError, ValidationError, ValueError):
         raise HTTPException(
             status_code = status.HTTP_403_FORBIDDEN,
             detail = "Could not validate credentials"
         )
-    user = session.get(User, token_data.sub)
-    if not user:
-        raise HTTPException(
-            status_code = status.HTTP_404_NOT_FOUND,
-            detail = "User not found"
-        )
-    return user
-
-def get_current_user_ws(session: SessionDep, websocket: WebSocket) -> User:
-    try: 
-        auth_header = websocket.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(status_code=403, detail="Invalid authorization header")
-        token = auth_header.split(" ")[1]  
-
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
-        token_data = TokenPayLoad(**payload)
-    except (InvalidTokenError, ValidationError):
+    auth_user = auth_cache.get(user_id)
+    if auth_user is None:
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code = status.HTTP_404_NOT_FOUND,
+                detail = "User not found"
+            )
+        auth_user = auth_cache.remember(user)
+    if token_data.ver != auth_user.token_version:
         raise HTTPException(
             status_code = status.HTTP_403_FORBIDDEN,
             detail = "Could not validate credentials"
         )
-    user = session.get(User, token_data.sub)
+    return auth_user
+
+def get_current_user(session: SessionDep, token: TokenDep) -> AuthUser:
+    return authenticate_token(session, token)
+
+def get_current_user_ws(session: SessionDep, websocket: WebSocket) -> AuthUser:
+    auth_header = websocket.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=403, detail="Invalid authorization header")
+    token = auth_header.split(" ")[1]  
+    return authenticate_token(session, token)
+
+CurrentUser = Annotated[AuthUser, Depends(get_current_user)]
+CurrentUserWs = Annotated[AuthUser, Depends(get_current_user_ws)]
+
+def get_current_user_record(session: SessionDep, current_user: CurrentUser) -> User:
+    """
+    The full user row of the caller, for the handlers that need more than id and role
+    (profile, password, notification counters...). Costs the primary-key query CurrentUser avoids.
+    """
+    user = session.get(User, current_user.id)
     if not user:
         raise HTTPException(
             status_code = status.HTTP_404_NOT_FOUND,
@@ -65,12 +107,11 @@ def get_current_user_ws(session: SessionDep, websocket: WebSocket) -> User:
         )
     return user
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
-CurrentUserWs = Annotated[User, Depends(get_current_user_ws)]
+CurrentUserRecord = Annotated[User, Depends(get_current_user_record)]
 
 def get_current_admin(
     current_user: CurrentUser
-) -> User:
+) -> AuthUser:
     """
     Checks if the current user is an active admin.
 
@@ -84,11 +125,11 @@ def get_current_admin(
         )
     return current_user
 
-CurrentAdmin = Annotated[User, Depends(get_current_admin)]
+CurrentAdmin = Annotated[AuthUser, Depends(get_current_admin)]
 
 def get_current_active_collector(
     current_user: CurrentUser
-) -> User:
+) -> AuthUser:
     """
     Checks if the current user is an active collector.
     
@@ -103,7 +144,7 @@ def get_current_active_collector(
     return current_user
 
 # Create a convenient shortcut, similar to CurrentUser
-CurrentCollector = Annotated[User, Depends(get_current_active_collector)]
+CurrentCollector = Annotated[AuthUser, Depends(get_current_active_collector)]
 
 async def get_ws_session_and_user(
     websocket: WebSocket,
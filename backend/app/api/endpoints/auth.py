@@ -24,7 +24,7 @@ def signin_access_token(session: SessionDep, form_data: Annotated[OAuth2Password
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
-        access_token=create_access_token(user.id, expires_delta=access_token_expires),
+        access_token=create_access_token(user.id, expires_delta=access_token_expires, token_version=user.token_version),
         token_type="bearer",
     )
 
@@ -38,7 +38,7 @@ def login(session: SessionDep, login: UserLogin):
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
-        access_token=create_access_token(user.id, expires_delta=access_token_expires),
+        access_token=create_access_token(user.id, expires_delta=access_token_expires, token_version=user.token_version),
         token_type="bearer",
     )
 
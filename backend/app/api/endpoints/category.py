@@ -1,5 +1,5 @@
 from typing import Annotated, Any, List
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, UploadFile, File, Form, Request, Response
 import uuid
 
 from app.schemas.auth import Message
@@ -8,18 +8,42 @@ from app.api.deps import SessionDep, CurrentUser, CurrentAdmin
 from app.schemas.category import CategoryPublic, CategoryCreate, CategoryUpdate
 from app import crud
 from app.services.upload import upload_category_icon
+from app.services import category_cache
+from app.core.serialization import PrevalidatedJSONResponse
 
 router = APIRouter(prefix="/category", tags=["category"])
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match uses the weak comparison: W/"x" matches "x", and * matches any current representation.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
+
 @router.get("/", response_model=List[CategoryPublic])
-def get_categories(session: SessionDep) -> Any:
-    return crud.get_all_categories(session=session)
+def get_categories(session: SessionDep, request: Request) -> Any:
+    """
+    The whole catalog, served from the in-process cache with a strong ETag;
+    send it back in If-None-Match to get a 304 when nothing changed.
+    """
+    body, etag = category_cache.get_catalog(session)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("If-None-Match", ""), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return PrevalidatedJSONResponse(content=body, headers=headers)
+
+
+def invalidate_catalog(background_tasks: BackgroundTasks) -> None:
+    # Drop this worker's copy now; tell the other workers once the response is sent.
+    category_cache.invalidate()
+    background_tasks.add_task(category_cache.publish_invalidation)
 
 @router.post("/", response_model=CategoryPublic, status_code=status.HTTP_201_CREATED)
 def create_category(
     session: SessionDep, 
     current_user: CurrentUser, 
     category_create: CategoryCreate, 
+    background_tasks: BackgroundTasks,
     ):
     existing_category = crud.get_category_by_slug(session=session, slug=category_create.slug)
     if existing_category:
@@ -27,14 +51,16 @@ def create_category(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Category with this slug already exists",
         )
-    return crud.create_category(
+    category = crud.create_category(
         session=session, 
         category_create=category_create, 
         current_user=current_user
         )
+    invalidate_catalog(background_tasks)
+    return category
 
 @router.delete("/{category_slug}", response_model=Message)
-def delete_category(session: SessionDep, current_user: CurrentUser, category_slug: str) -> Any:
+def delete_category(session: SessionDep, current_user: CurrentUser, category_slug: str, background_tasks: BackgroundTasks) -> Any:
     category = crud.get_category_by_slug(session=session, slug=category_slug)
     if not category:
         raise HTTPException(
@@ -42,6 +68,7 @@ def delete_category(session: SessionDep, current_user: CurrentUser, category_slu
             detail="Category not found",
         )
     crud.delete_category(session=session, category=category)
+    invalidate_catalog(background_tasks)
     return {"message": "Category deleted successfully"}
 
 @router.get("/{category_slug}", response_model=CategoryPublic)
@@ -59,7 +86,8 @@ def update_category(
     session: SessionDep, 
     current_admin: CurrentAdmin, 
     category_slug: str, 
-    category_update: CategoryUpdate
+    category_update: CategoryUpdate,
+    background_tasks: BackgroundTasks,
     ) -> Any:
     category = crud.get_category_by_slug(session=session, slug=category_slug)
     if not category:
@@ -67,19 +95,22 @@ def update_category(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found",
         )
-    return crud.update_category(
+    category = crud.update_category(
         session=session, 
         category=category, 
         category_update=category_update, 
         current_user=current_admin, 
     )
+    invalidate_catalog(background_tasks)
+    return category
 
 @router.post("/upload-icon/{category_slug}", response_model=CategoryPublic)
 def upload_icon(
     session: SessionDep,
     current_admin: CurrentAdmin,
     category_slug: str,
-    file: Annotated[UploadFile, File(...)]
+    file: Annotated[UploadFile, File(...)],
+    background_tasks: BackgroundTasks,
 ):
     category = crud.get_category_by_slug(session=session, slug=category_slug)
     if not category:
@@ -94,9 +125,11 @@ def upload_icon(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload icon: {str(e)}"
         )
-    return crud.update_category_icon(
+    category = crud.update_category_icon(
         session=session, 
         category=category, 
         current_user=current_admin, 
         icon_url=icon_url
     )
+    invalidate_catalog(background_tasks)
+    return category
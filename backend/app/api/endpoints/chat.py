@@ -1,24 +1,59 @@
 import time
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
+import uuid
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, Response
 
 from app import crud
-from app.schemas.chat import ConversationCreate, MessageCreate, ConversationPublic, MessagePublic
+from app.schemas.chat import ConversationCreate, MessageCreate, ConversationPublic, ConversationInboxPublic, MessagePublic, ReadStatePublic
+from app.models import ConversationMember as ConversationMemberModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemas.user import UserPublic
-from app.api.deps import SessionDep, CurrentUser, CurrentUserWs
+from app.api.deps import AsyncSessionDep, AsyncReadSessionDep, CurrentUser, CurrentUserWs
+from app.core.db import mark_recent_write
+from app.core.pagination import decode_cursor, split_page
+from app.core.serialization import prevalidated_list_response
+from app.services.broker import broker
 from typing import Dict, Annotated
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-active_connections: Dict[int, WebSocket] = {}
+def user_channel(user_id: uuid.UUID) -> str:
+    return f"chat:user:{user_id}"
+
+async def publish_read_receipt(session: AsyncSession, read_state: ConversationMemberModel):
+    """
+    Tell the other members how far this member has read.
+    """
+    event = {
+        "type": "read",
+        "data": {
+            "conversation_id": str(read_state.conversation_id),
+            "user_id": str(read_state.user_id),
+            "last_read_message_id": str(read_state.last_read_message_id) if read_state.last_read_message_id else None,
+            "last_read_at": read_state.last_read_at.isoformat() if read_state.last_read_at else None,
+        }
+    }
+    members = await crud.get_conversation_members_async(session, read_state.conversation_id)
+    for member in members:
+        if member.user_id != read_state.user_id:
+            await broker.publish(user_channel(member.user_id), event)
 
 @router.websocket("/ws/chat")
 async def chat_websocket(
     websocket: WebSocket, 
     current_user: CurrentUserWs,
-    session: SessionDep
+    session: AsyncSessionDep
     ):
+    """
+    Messages are published on each recipient's channel; the worker holding the recipient's
+    socket is subscribed to that channel and delivers them, wherever the sender is connected.
+    """
     await websocket.accept()
-    active_connections[current_user.id] = websocket
+
+    async def deliver(event: dict):
+        await websocket.send_json(event)
+
+    channel = user_channel(current_user.id)
+    await broker.subscribe(channel, deliver)
 
     try:
         while True:
@@ -27,52 +62,124 @@ async def chat_websocket(
             match type:
                 case "message":
                     message_in = MessageCreate(**msg.get("data"))
-                    message = crud.create_message(session=session, message_create=message_in, sender_id=current_user.id)
+                    message = await crud.create_message_async(session=session, message_create=message_in, sender_id=current_user.id)
+                    await mark_recent_write(str(current_user.id))
 
-                    members = crud.get_conversation_members(session, message_in.conversation_id)
+                    event = {
+                        "type": "message",
+                        "data": {
+                            "id": str(message.id),
+                            "conversation_id": str(message.conversation_id),
+                            "sender_id": str(message.sender_id),
+                            "content": message.content,
+                            "created_at": message.created_at.isoformat()
+                        }
+                    }
+                    members = await crud.get_conversation_members_async(session, message_in.conversation_id)
                     for member in members:
-                        if member.user_id in active_connections and member.user_id != current_user.id:
-                            await active_connections[member.user_id].send_json({
-                                "type": "message",
-                                "data": {
-                                    "id": str(message.id),
-                                    "conversation_id": str(message.conversation_id),
-                                    "sender_id": str(message.sender_id),
-                                    "content": message.content,
-                                    "created_at": message.created_at.isoformat()
-                                }
-                            })
+                        if member.user_id != current_user.id:
+                            await broker.publish(user_channel(member.user_id), event)
+                case "read":
+                    data = msg.get("data")
+                    try:
+                        conversation_id = uuid.UUID(str(data.get("conversation_id")))
+                    except (AttributeError, ValueError):
+                        await websocket.send_json({"error": "Invalid conversation_id"})
+                        continue
+                    read_state = await crud.mark_messages_as_read_async(session, conversation_id, current_user.id)
+                    if read_state:
+                        await mark_recent_write(str(current_user.id))
+                        await publish_read_receipt(session, read_state)
                 case _:
                     await websocket.send_json({"error": "Unknown message type"})
 
     except WebSocketDisconnect:
-        del active_connections[current_user.id]
+        pass
+    finally:
+        await broker.unsubscribe(channel, deliver)
 
 @router.post("/conversations/", response_model=ConversationPublic)
 async def create_conversation(
-    session: SessionDep,
+    session: AsyncSessionDep,
     conversation_create: ConversationCreate,
     current_user: CurrentUser,
 ):
-    conversation = crud.create_conversation(session = session, conversation_create = conversation_create, user_id = current_user.id)
+    conversation = await crud.create_conversation_async(session = session, conversation_create = conversation_create, user_id = current_user.id)
     return conversation
 
-@router.get("/conversations/", response_model=list[ConversationPublic])
+@router.get("/conversations/", response_model=list[ConversationInboxPublic])
 async def get_conversations(
-    session: SessionDep,
+    session: AsyncReadSessionDep,
     current_user: CurrentUser,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
 ):
-    conversations = crud.get_user_conversations_and_last_message(session=session, user_id=current_user.id)
-    return conversations
+    """
+    The current user's conversations, most recently active first, with the last message,
+    the members and the user's unread count.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    """
+    rows = await crud.get_user_conversation_inbox_async(
+        session=session,
+        user_id=current_user.id,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+    page, next_cursor = split_page(rows, limit, key=lambda row: (row[0].updated_at, row[0].id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        ConversationInboxPublic.model_validate(conversation, from_attributes=True).model_copy(update={"unread_count": unread_count})
+        for conversation, unread_count in page
+    ]
+
+@router.post("/conversations/{conversation_id}/read", response_model=ReadStatePublic)
+async def mark_conversation_as_read(
+    conversation_id: uuid.UUID,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+):
+    """
+    Mark everything up to the conversation's last message as read and send a read receipt to the other members.
+    """
+    read_state = await crud.mark_messages_as_read_async(session, conversation_id, current_user.id)
+    if not read_state:
+        raise HTTPException(status_code=403, detail="Not a member of this conversation")
+    await publish_read_receipt(session, read_state)
+    return read_state
 
 @router.get("/conversations/{conversation_id}/messages/", response_model=list[MessagePublic])
 async def get_messages(
-    conversation_id: str,
-    session: SessionDep,
+    conversation_id: uuid.UUID,
+    session: AsyncReadSessionDep,
     current_user: CurrentUser,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    before: str | None = None,
+    after: str | None = None,
 ):
-    members = crud.get_conversation_members(session, conversation_id)
+    """
+    Messages in chronological order: the newest `limit` by default, older ones with
+    `before=<X-Before-Cursor>`, newer ones with `after=<X-After-Cursor>`.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    members = await crud.get_conversation_members_async(session, conversation_id)
     if current_user.id not in [member.user_id for member in members]:
         raise HTTPException(status_code=403, detail="Not a member of this conversation")
-    messages = crud.get_messages_by_conversation(session=session, conversation_id=conversation_id)
-    return messages
+    messages = await crud.get_messages_by_conversation_async(
+        session=session,
+        conversation_id=conversation_id,
+        limit=limit + 1,
+        before=decode_cursor(before) if before else None,
+        after=decode_cursor(after) if after else None,
+    )
+    page, next_cursor = split_page(messages, limit, key=lambda m: (m.created_at, m.id))
+    if after:
+        if next_cursor:
+            response.headers["X-After-Cursor"] = next_cursor
+        return prevalidated_list_response(MessagePublic, page, response)
+    if next_cursor:
+        response.headers["X-Before-Cursor"] = next_cursor
+    return prevalidated_list_response(MessagePublic, page[::-1], response)
@@ -1,12 +1,13 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlmodel import Session
 from app.models import User
-from app.api.deps import SessionDep, CurrentUser, CurrentAdmin, get_db
+from app.api.deps import SessionDep, AsyncSessionDep, ReadSessionDep, CurrentUser, CurrentAdmin, get_db
 from typing import List
 import uuid
-from app.schemas.notification import NotificationCreate, NotificationPublic
+from app.schemas.notification import NotificationCreate, NotificationPublic, NotificationJobPublic
 from app import crud
+from app.services import notification_jobs
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -20,19 +21,39 @@ def send_notification(
     notification = crud.create_notification(session, notification_in, user_ids)
     return notification
 
-@router.post("/send_all", response_model=NotificationPublic)
-def send_notification_to_all(
+@router.post("/send_all", response_model=NotificationJobPublic, status_code=status.HTTP_202_ACCEPTED)
+async def send_notification_to_all(
     notification_in: NotificationCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
+    current_admin: CurrentAdmin,
+    background_tasks: BackgroundTasks
+):
+    """
+    Store the notification and deliver it to every user in a background job.
+    Poll GET /notifications/jobs/{job_id} for progress.
+    """
+    notification = await crud.create_notification_to_all(session, notification_in)
+    if notification.is_global:
+        # Stored once and visible to every user: nothing to fan out.
+        return await notification_jobs.create_job(notification.id, status="completed")
+    job = await notification_jobs.create_job(notification.id)
+    background_tasks.add_task(notification_jobs.run_fan_out, job["id"], notification.id)
+    return job
+
+@router.get("/jobs/{job_id}", response_model=NotificationJobPublic)
+async def get_notification_job(
+    job_id: uuid.UUID,
     current_admin: CurrentAdmin
 ):
-    notification = crud.create_notification_to_all(session, notification_in)
-    return notification
+    job = await notification_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @router.get("/", response_model=List[NotificationPublic])
 def get_notifications(
-    session: SessionDep,
+    session: ReadSessionDep,
     current_admin: CurrentAdmin
 ):
     notifications = crud.get_all_notifications(session)
@@ -1,37 +1,42 @@
 
 
+import json
 import uuid
 from app import crud
-from fastapi import HTTPException, status, UploadFile, APIRouter, File
+from fastapi import HTTPException, status, UploadFile, APIRouter, File, BackgroundTasks, Query, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 from typing import Annotated, List, Tuple
 from geoalchemy2.shape import to_shape
 
-from app.api.deps import SessionDep, CurrentUser, CurrentCollector
-from app.schemas.order import OrderCreate, OrderItemCreate, OrderItemUpdate, OrderPublic, OrderAcceptRequest, OrderAcceptResponse, NearbyOrderPublic
+from app.api.deps import SessionDep, AsyncSessionDep, ReadSessionDep, AsyncReadSessionDep, CurrentUser, CurrentUserWs, CurrentCollector
+from app.schemas.order import OrderCreate, OrderItemCreate, OrderItemUpdate, OrderPublic, OrderPublicStored, OrderAcceptRequest, OrderAcceptResponse, NearbyOrderPublic, NearbyCollectorPublic, OrderFeedSubscribe
 from app.schemas.route import RoutePublic
 from app.schemas.auth import Message
 from app.schemas.user import UserPublic, CollectorPublic
 from app.schemas.review import ReviewCreate, ReviewPublic
-from app.models import User, Order, OrderStatus
+from app.models import User, Order, OrderStatus, UserRole
 from app import crud
-from app.services import mapbox, upload
+from app.services import collector_geo, mapbox, mapbox_cache, upload
+from app.services.order_feed import order_feed
+from app.core.pagination import decode_cursor, split_page
+from app.core.serialization import prevalidated_list_response
 from app.schemas.transaction import OrderCompletionRequest, TransactionReadResponse
 
 
-import asyncio
-
-
 router = APIRouter(
     tags=["Orders & Payment"]
 )
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=OrderPublic)
-def create_order(order: OrderCreate, current_user: CurrentUser,session: SessionDep):
+async def create_order(order: OrderCreate, current_user: CurrentUser, session: AsyncSessionDep):
     """
     Create a new order. Backend will geocode pickup_address using Mapbox.
     """
-    
-    db_order = asyncio.run(crud.create_order(session=session, order_create=order, owner_id=current_user.id))
+    try:
+        db_order = await crud.create_order(session=session, order_create=order, owner_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    await order_feed.publish_created(db_order)
     return db_order
 
 
@@ -109,7 +114,7 @@ async def list_nearby_orders(
     lat: float,
     lng: float,
     current_collector: CurrentCollector,
-    session: SessionDep,
+    session: AsyncReadSessionDep,
     radius_km: float = 50.0,
     limit: int = 10
 ):
@@ -117,36 +122,35 @@ async def list_nearby_orders(
     List pending orders, enriched with bird-fly distance and real travel info.
     """
     # 1. LẤY ỨNG CỬ VIÊN VÀ KHOẢNG CÁCH ĐƯỜNG CHIM BAY TỪ POSTGIS
-    candidate_pairs: List[Tuple[Order, float]] = crud.get_nearby_pending_orders_candidates(
+    candidate_pairs: List[Tuple[Order, float]] = await crud.get_nearby_pending_orders_candidates_async(
         db=session, latitude=lat, longitude=lng, radius_km=radius_km, limit=limit
     )
 
     if not candidate_pairs:
         return []
 
-    # 2. CHUẨN BỊ DỮ LIỆU VÀ GỌI MAPBOX
-    orders_only = [pair[0] for pair in candidate_pairs] # Chỉ lấy list các object Order
+    # 2. CHUẨN BỊ DỮ LIỆU VÀ GỌI MAPBOX (chỉ cho các đơn chưa có trong cache)
     origin_coords = (lng, lat)
-    destination_coords = []
-    for order in orders_only:
+    destination_coords = {}
+    for order, _ in candidate_pairs:
         if order.location:
             point = to_shape(order.location)   
-            destination_coords.append((point.x, point.y))
-    travel_info_list = await mapbox.get_travel_info_from_mapbox(
+            destination_coords[order.id] = (point.x, point.y)
+    travel_info = await mapbox.get_travel_info_for_orders(
         origin=origin_coords, destinations=destination_coords
     )
 
     # 3. KẾT HỢP DỮ LIỆU VÀ TẠO RESPONSE OBJECTS
     response_objects = []
-    for i, (order_model, distance) in enumerate(candidate_pairs):
+    for order_model, distance in candidate_pairs:
         # Tạo một dictionary từ model object
         order_data = order_model.__dict__
         
         # Thêm các trường đã tính toán vào dictionary
         order_data['distance_km'] = distance
-        if travel_info_list and i < len(travel_info_list):
-            order_data['travel_time_seconds'] = travel_info_list[i]["duration"]
-            order_data['travel_distance_meters'] = travel_info_list[i]["distance"]
+        if order_model.id in travel_info:
+            order_data['travel_time_seconds'] = travel_info[order_model.id]["duration"]
+            order_data['travel_distance_meters'] = travel_info[order_model.id]["distance"]
             
         # Tạo đối tượng schema từ dictionary đã hoàn chỉnh
         # Pydantic sẽ tự động xác thực và chuyển đổi kiểu dữ liệu
@@ -155,6 +159,45 @@ async def list_nearby_orders(
     return response_objects
 
 
+@router.websocket("/ws/feed")
+async def order_feed_websocket(websocket: WebSocket, current_user: CurrentUserWs):
+    """
+    Push alternative to polling /nearby for collectors.
+    Send {"type": "subscribe", "data": {"lat", "lng", "radius_km"}} whenever the position changes;
+    the server pushes "order_created" for new PENDING orders in that area and "order_retracted" once they are accepted.
+    """
+    if current_user.role not in (UserRole.COLLECTOR, UserRole.ADMIN):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Collector role required")
+        return
+    await websocket.accept()
+    subscription_id = uuid.uuid4()
+
+    try:
+        while True:
+            try:
+                msg = json.loads(await websocket.receive_text())
+                msg_type = msg.get("type")
+            except (json.JSONDecodeError, AttributeError):
+                await websocket.send_json({"error": "Invalid message"})
+                continue
+            match msg_type:
+                case "subscribe":
+                    try:
+                        area = OrderFeedSubscribe(**(msg.get("data") or {}))
+                    except (ValidationError, TypeError):
+                        await websocket.send_json({"error": "Invalid subscription area"})
+                        continue
+                    order_feed.subscribe(subscription_id, area.lat, area.lng, area.radius_km, websocket.send_json)
+                case "unsubscribe":
+                    order_feed.unsubscribe(subscription_id)
+                case _:
+                    await websocket.send_json({"error": "Unknown message type"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        order_feed.unsubscribe(subscription_id)
+
+
 @router.get("/{order_id:uuid}", response_model=OrderPublic)
 def get_order(
     order_id: uuid.UUID, 
@@ -173,30 +216,65 @@ def get_order(
 
 
 
-# Lấy tất cả đơn hàng của user
+# Lấy đơn hàng của user (phân trang theo cursor, mới nhất trước)
 @router.get("/", response_model=list[OrderPublic])
-def get_orders_for_user(current_user: CurrentUser, session: SessionDep):
+def get_orders_for_user(
+    current_user: CurrentUser,
+    session: ReadSessionDep,
+    response: Response,
+    order_status: OrderStatus | None = Query(default=None, alias="status"),
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=100),
+):
     """
-    Get all orders for the current user.
+    Get the current user's orders, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
-    orders = crud.get_orders_by_user(session=session, user_id=current_user.id)
-    return orders
+    orders = crud.get_orders_by_user(
+        session=session,
+        user_id=current_user.id,
+        status=order_status,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+    page, next_cursor = split_page(orders, limit, key=lambda o: (o.created_at, o.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return prevalidated_list_response(OrderPublicStored, page, response)
 
-# Lấy tất cả đơn hàng của collector
+# Lấy đơn hàng của collector (phân trang theo cursor, mới nhất trước)
 @router.get("/collector", response_model=list[OrderPublic])
-def get_orders_for_collector(current_collector: CurrentCollector, session: SessionDep):
+def get_orders_for_collector(
+    current_collector: CurrentCollector,
+    session: ReadSessionDep,
+    response: Response,
+    order_status: OrderStatus | None = Query(default=None, alias="status"),
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=100),
+):
     """
-    Get all orders assigned to the current collector.
+    Get orders assigned to the current collector, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
     """
-    orders = crud.get_orders_by_collector(session=session, collector_id=current_collector.id)
-    return orders
+    orders = crud.get_orders_by_collector(
+        session=session,
+        collector_id=current_collector.id,
+        status=order_status,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+    page, next_cursor = split_page(orders, limit, key=lambda o: (o.created_at, o.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return prevalidated_list_response(OrderPublicStored, page, response)
 
 @router.post("/{order_id}/accept", response_model=OrderAcceptResponse, status_code=status.HTTP_200_OK)
 def accept_order(
     order_id: uuid.UUID,
     payload: OrderAcceptRequest,
     current_collector: CurrentCollector,
-    session: SessionDep
+    session: SessionDep,
+    background_tasks: BackgroundTasks
 ):
     """Collector accepts (claims) an order -> status becomes ACCEPTED and collector assigned.
 
@@ -206,6 +284,26 @@ def accept_order(
     - Collector performing action matches current_collector (redundant but explicit).
     """
     order = crud.accept_order_service(db=session, order_id=order_id, collector=current_collector, note=payload.note)
+    # The order is no longer PENDING: cached travel times to it are useless for /nearby,
+    # and collectors who were pushed the order get it retracted.
+    background_tasks.add_task(mapbox_cache.invalidate_travel_info, order.id)
+    if order.location is not None:
+        order_point = to_shape(order.location)
+        background_tasks.add_task(order_feed.publish_retracted, order.id, order_point.y, order_point.x)
+
+    # Precompute the route so the collector's first navigation request is served from cache.
+    start = None
+    if payload.lat is not None and payload.lng is not None:
+        start = (payload.lng, payload.lat)
+    else:
+        # The last known position is on the user row, not in the cached auth user
+        collector = session.get(User, current_collector.id)
+        if collector and collector.current_location is not None:
+            collector_point = to_shape(collector.current_location)
+            start = (collector_point.x, collector_point.y)
+    if start and order.location is not None:
+        end = to_shape(order.location)
+        background_tasks.add_task(mapbox.get_order_route, order.id, start[0], start[1], end.x, end.y)
     return order
 
 @router.post(
@@ -244,14 +342,14 @@ def complete_order_and_pay(
 async def get_route_for_order(
     order_id: uuid.UUID, 
     current_collector: CurrentCollector, 
-    session: SessionDep,
+    session: AsyncSessionDep,
     lat: float,
     lon: float
     ):
     """
     Get route information from collector's current location to the order's pickup location.
     """
-    order = crud.get_order_by_id(session=session, order_id=order_id)
+    order = await crud.get_order_by_id_async(session=session, order_id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     if not order.location:
@@ -260,7 +358,8 @@ async def get_route_for_order(
         raise HTTPException(status_code=403, detail="You can only view routes for your own orders")
     order = OrderPublic.from_orm(order)
     
-    route_info = await mapbox.get_route_from_mapbox(
+    route_info = await mapbox.get_order_route(
+        order_id=order_id,
         start_lon=lon,
         start_lat=lat,
         end_lon=order.location['coordinates'][0],
@@ -272,6 +371,28 @@ async def get_route_for_order(
     
     return route_info
 
+@router.get("/{order_id}/collectors/nearby", response_model=List[NearbyCollectorPublic])
+async def list_nearby_collectors(
+    order_id: uuid.UUID,
+    current_user: CurrentUser,
+    session: AsyncReadSessionDep,
+    radius_km: float = Query(default=5.0, gt=0, le=50),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """
+    Online collectors within radius_km of the order's pickup location, nearest first.
+    Served from the live position index in Redis, not from PostGIS.
+    """
+    order = await session.get(Order, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if order.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You can only view collectors near your own orders")
+    if not order.location:
+        raise HTTPException(status_code=400, detail="Order does not have a valid location")
+    point = to_shape(order.location)
+    return await collector_geo.find_nearby(lat=point.y, lng=point.x, radius_km=radius_km, limit=limit)
+
 @router.post("/{order_id}/upload/img", response_model=Message)
 def upload_order_image(
     order_id: uuid.UUID,
@@ -327,11 +448,19 @@ def get_order_collector(order_id: uuid.UUID, current_user:CurrentUser, session:S
         raise HTTPException(status_code=404, detail="Order not found")
     if not order.collector_id:
         raise HTTPException(status_code=404, detail="No collector assigned yet")
-    collector = crud.get_user_by_id(session=session, user_id=order.collector_id)
-    if not collector:
+    profile = crud.get_collector_profile(session=session, collector_id=order.collector_id)
+    if not profile:
         raise HTTPException(status_code=404, detail="Collector not found")
-    avg_rating = crud.get_user_average_rating(session, collector.id)
-    return CollectorPublic(**collector.dict(), average_rating=avg_rating)
+    collector, stats = profile
+    if not stats:
+        return CollectorPublic(**collector.dict())
+    return CollectorPublic(
+        **collector.dict(),
+        average_rating=stats.rating_sum / stats.rating_count if stats.rating_count else None,
+        rating_count=stats.rating_count,
+        completed_orders=stats.completed_orders,
+        total_quantity=stats.total_quantity,
+    )
 
 
 @router.post("/{order_id}/review", response_model=ReviewPublic)
@@ -351,17 +480,7 @@ def review_collector_for_order(order_id: uuid.UUID, review: ReviewCreate, curren
     # Only allow one review per order
     if order.review:
         raise HTTPException(status_code=400, detail="Order already reviewed")
-    from app.models import Review
-    db_review = Review(
-        user_id=current_user.id,
-        order_id=order_id,
-        rating=review.rating,
-        comment=review.comment
-    )
-    session.add(db_review)
-    session.commit()
-    session.refresh(db_review)
-    return db_review
+    return crud.create_review(session=session, order=order, user_id=current_user.id, review_create=review)
 
 @router.get("/{order_id}/review", response_model=ReviewPublic)
 def get_order_review(order_id: uuid.UUID, session:SessionDep, current_user:CurrentUser):
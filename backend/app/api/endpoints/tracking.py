@@ -1,53 +1,79 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
-from sqlmodel import Session
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Tuple
 import uuid, json
 
-from app.models import User, Order
+from app.models import Order
 from app.api.deps import SessionDep, CurrentUserWs
+from app.services import collector_geo
+from app.services.broker import broker
+from app.services.location_buffer import location_buffer
 
 router = APIRouter(prefix="/ws", tags=["websocket-tracking"])
 
 
+def order_channel(order_id: str) -> str:
+    return f"tracking:order:{order_id}"
+
+
 class ConnectionManager:
+    """
+    Sockets are held by the worker they connected to; locations travel between workers over the
+    broker on the order's channel, so the collector and the owner may be connected to different workers.
+    """
     def __init__(self):
         self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        self._owner_handlers: Dict[str, Callable[[dict], Awaitable[None]]] = {}
 
     async def connect(self, websocket: WebSocket, order_id: str, client_type: str):
         await websocket.accept()
         if order_id not in self.active_connections:
             self.active_connections[order_id] = {}
         self.active_connections[order_id][client_type] = websocket
+        if client_type == "owner" and order_id not in self._owner_handlers:
+            handler = self._make_owner_handler(order_id)
+            self._owner_handlers[order_id] = handler
+            await broker.subscribe(order_channel(order_id), handler)
         print(f"Client '{client_type}' for order '{order_id}' connected.")
 
-    def disconnect(self, order_id: str, client_type: str):
+    async def disconnect(self, order_id: str, client_type: str):
         if order_id in self.active_connections and client_type in self.active_connections[order_id]:
             del self.active_connections[order_id][client_type]
             if not self.active_connections[order_id]:
                 del self.active_connections[order_id]
+        if client_type == "owner" and order_id in self._owner_handlers:
+            await broker.unsubscribe(order_channel(order_id), self._owner_handlers.pop(order_id))
         print(f"Client '{client_type}' for order '{order_id}' disconnected.")
 
-    async def broadcast_location_to_owner(self, order_id: str, lat: float, lng: float):
-        if order_id in self.active_connections:
-            owner_ws = self.active_connections[order_id].get("owner")
+    def _make_owner_handler(self, order_id: str):
+        async def send_to_owner(location: dict):
+            owner_ws = self.active_connections.get(order_id, {}).get("owner")
             if owner_ws:
                 try:
-                    await owner_ws.send_json({"lat": lat, "lng": lng})
+                    await owner_ws.send_json(location)
                 except Exception as e:
                     print(f"Error sending to owner of {order_id}: {e}")
+        return send_to_owner
+
+    async def broadcast_location_to_owner(self, order_id: str, lat: float, lng: float):
+        await broker.publish(order_channel(order_id), {"lat": lat, "lng": lng})
 
 
 manager = ConnectionManager()
 
 
-def update_collector_location_in_db(db: Session, collector_id: uuid.UUID, lat: float, lng: float):
-    collector = db.get(User, collector_id)
-    if collector:
-        collector.current_location = f'SRID=4326;POINT({lng} {lat})'
-        db.add(collector)
-        db.commit()
-    else:
-        print(f"Collector {collector_id} not found in DB for location update.")
+def parse_location(data: str) -> Tuple[float, float] | None:
+    """
+    (lat, lng) of a collector ping, or None unless both are numbers within range.
+    """
+    try:
+        location = json.loads(data)
+        lat, lng = float(location["lat"]), float(location["lng"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
+    # NaN fails both comparisons as well.
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
 
 
 @router.websocket("/track/{order_id}/{client_type}")
@@ -58,6 +84,7 @@ async def websocket_tracking_endpoint(
     session: SessionDep,
     current_user: CurrentUserWs
 ):
+    connected = False
     try:
         # --- AUTHORIZATION ---
         order = session.get(Order, uuid.UUID(order_id))
@@ -70,29 +97,36 @@ async def websocket_tracking_endpoint(
         if not (is_owner or is_collector):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unauthorized")
             return
+        # Locations go through location_buffer: don't hold a DB connection for the socket's lifetime.
+        session.close()
 
         
         await manager.connect(websocket, order_id, client_type)
+        connected = True
 
        
         while True:
             if client_type == "collector":
                 data = await websocket.receive_text()
-                try:
-                    location_data = json.loads(data)
-                    lat, lng = location_data.get("lat"), location_data.get("lng")
-                    if lat is not None and lng is not None and order.collector_id:
-                        
-                        update_collector_location_in_db(session, order.collector_id, lat, lng)
-                        await manager.broadcast_location_to_owner(order_id, lat, lng)
-                except (json.JSONDecodeError, AttributeError):
-                    pass
+                location = parse_location(data)
+                if location is None:
+                    await websocket.send_json({"error": "Invalid location"})
+                    continue
+                lat, lng = location
+                if order.collector_id:
+                    location_buffer.add(order.collector_id, lat, lng)
+                    await collector_geo.record_position(order.collector_id, lat, lng)
+                    await manager.broadcast_location_to_owner(order_id, lat, lng)
             else:
                 await websocket.receive_text()
     
     except WebSocketDisconnect:
-        manager.disconnect(order_id, client_type)
+        pass
     
     finally:
+        # Whatever ended the loop: drop the socket and the owner's broker subscription.
+        # Only for a socket that got connected, not for another client's entry under the same order.
+        if connected:
+            await manager.disconnect(order_id, client_type)
         if session:
             session.close()
\ No newline at end of file
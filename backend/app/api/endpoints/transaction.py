@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlmodel import Session, select
-from app.api.deps import get_db
+from app.api.deps import get_read_db
 from app.models import Transaction, Order
 from app.schemas.transaction import TransactionReadResponse
 from app.api.deps import get_current_user
+from app.core.serialization import prevalidated_list_response
 from typing import List, Optional
 import uuid
 
@@ -12,7 +13,7 @@ router = APIRouter()
 @router.get("/user/{user_id}", response_model=List[TransactionReadResponse])
 def get_transactions_by_user(
     user_id: uuid.UUID,
-    session: Session = Depends(get_db),
+    session: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0)
@@ -24,12 +25,12 @@ def get_transactions_by_user(
         (Transaction.payer_id == user_id) | (Transaction.payee_id == user_id)
     ).offset(offset).limit(limit)
     results = session.exec(query).all()
-    return results
+    return prevalidated_list_response(TransactionReadResponse, results)
 
 @router.get("/order/{order_id}", response_model=List[TransactionReadResponse])
 def get_transactions_by_order(
     order_id: uuid.UUID,
-    session: Session = Depends(get_db),
+    session: Session = Depends(get_read_db),
     current_user=Depends(get_current_user)
 ):
     # Only allow access if the user owns the order or is payer/payee in the transaction
@@ -46,16 +47,16 @@ def get_transactions_by_order(
         txs = session.exec(tx_query).all()
         if not txs:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view transactions for this order.")
-        return txs
+        return prevalidated_list_response(TransactionReadResponse, txs)
     # If owner, return all transactions for the order
     query = select(Transaction).where(Transaction.order_id == order_id)
     results = session.exec(query).all()
-    return results
+    return prevalidated_list_response(TransactionReadResponse, results)
 
 @router.get("/", response_model=List[TransactionReadResponse])
 def get_transactions(
     status: Optional[str] = None,
-    session: Session = Depends(get_db),
+    session: Session = Depends(get_read_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0)
 ):
@@ -64,4 +65,4 @@ def get_transactions(
         query = query.where(Transaction.status == status)
     query = query.offset(offset).limit(limit)
     results = session.exec(query).all()
-    return results
+    return prevalidated_list_response(TransactionReadResponse, results)
@@ -1,20 +1,22 @@
 import uuid
 import requests
-from typing import Any
+from typing import Any, Literal
 from pydantic import EmailStr
 from sqlmodel import select, func
-from fastapi import APIRouter, HTTPException, status, File, UploadFile, Depends, Body
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, File, UploadFile, Depends, Body, Query, Response
 
 from app import crud
 from app.models import User
-from app.api.deps import CurrentUser, SessionDep, get_current_admin
+from app.api.deps import CurrentUser, CurrentUserRecord, SessionDep, ReadSessionDep, get_current_admin
 from app.services.email import verify_token
 from app.services.upload import upload_avatar
+from app.services import auth_cache, leaderboard
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash
-from app.schemas.user import UserUpdate, UserUpdateMe, UpdatePassword, UserPublic, UsersPublic
+from app.core.security import verify_password
+from app.schemas.user import UserUpdate, UserUpdateMe, UpdatePassword, UserPublic, UsersPublic, LeaderboardEntry
 from app.schemas.auth import Message
-from app.schemas.notification import NotificationPublic, UserNotification
+from app.schemas.notification import NotificationPublic, UserNotification, UnreadNotificationCount
+from app.core.pagination import decode_cursor, split_page
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -36,15 +38,20 @@ def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any: # t
 
     return UsersPublic(data=users, count=count)
 
+def invalidate_auth(background_tasks: BackgroundTasks, user_id: uuid.UUID) -> None:
+    # Drop this worker's cached auth entry now; tell the other workers once the response is sent.
+    auth_cache.invalidate(user_id)
+    background_tasks.add_task(auth_cache.publish_invalidation, user_id)
+
 @router.get("/me", response_model=UserPublic)
-def get_me(current_user: CurrentUser) -> Any:
+def get_me(current_user: CurrentUserRecord) -> Any:
     """
     Get the current authenticated user.
     """
     return current_user
 
 @router.patch("/me", response_model=UserPublic)
-def update_me(session: SessionDep, current_user: CurrentUser, user_update: UserUpdateMe) -> Any: # type: ignore
+def update_me(session: SessionDep, current_user: CurrentUserRecord, user_update: UserUpdateMe, background_tasks: BackgroundTasks) -> Any: # type: ignore
     """
     Update the current authenticated user.
     """
@@ -64,20 +71,25 @@ def update_me(session: SessionDep, current_user: CurrentUser, user_update: UserU
                 detail="Phone number already exists",
             )
     
-    return crud.update_user(session=session, user=current_user, user_update=user_update)
+    user = crud.update_user(session=session, user=current_user, user_update=user_update)
+    invalidate_auth(background_tasks, user.id)
+    return user
 
 @router.delete("/me", response_model=Message)
-def delete_me(session: SessionDep, current_user: CurrentUser) -> Any:
+def delete_me(session: SessionDep, current_user: CurrentUserRecord, background_tasks: BackgroundTasks) -> Any:
     """
     Delete the current authenticated user.
     """
+    user_id = current_user.id
     crud.delete_user(session=session, user=current_user)
+    invalidate_auth(background_tasks, user_id)
     return Message(message="User deleted successfully")
 
 @router.patch("/me/password", response_model=Message)
-def update_password(session: SessionDep, current_user: CurrentUser, password_update: UpdatePassword) -> Any:
+def update_password(session: SessionDep, current_user: CurrentUserRecord, password_update: UpdatePassword, background_tasks: BackgroundTasks) -> Any:
     """
     Update the password of the current authenticated user.
+    Every access token issued before, including the one of this request, stops working.
     """
     # Additional validation: ensure old password is not the same as new password
     if password_update.old_password == password_update.new_password:
@@ -92,14 +104,12 @@ def update_password(session: SessionDep, current_user: CurrentUser, password_upd
             detail="Old password is incorrect",
         )
     
-    current_user.hashed_password = get_password_hash(password_update.new_password)
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    crud.update_user_password(session, current_user, password_update.new_password)
+    invalidate_auth(background_tasks, current_user.id)
     return Message(message="Password updated successfully")
 
 @router.post("/upload/avatar", response_model=Message)
-def upload_user_avatar(session: SessionDep, current_user: CurrentUser, file: UploadFile = File(...)) -> Any:
+def upload_user_avatar(session: SessionDep, current_user: CurrentUserRecord, background_tasks: BackgroundTasks, file: UploadFile = File(...)) -> Any:
     """
     Upload a new avatar image for the current authenticated user.
     """
@@ -112,15 +122,46 @@ def upload_user_avatar(session: SessionDep, current_user: CurrentUser, file: Upl
 
     image_url = upload_avatar(file, str(current_user.id))
     crud.update_user(session, current_user, UserUpdate(avt_url=image_url))
+    invalidate_auth(background_tasks, current_user.id)
     return Message(message=image_url)
 
 @router.get("/me/notifications", response_model=list[UserNotification])
 def get_notifications(
+    session: ReadSessionDep,
+    current_user: CurrentUser,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=100),
+):
+    """
+    The current user's notifications, newest first.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    """
+    notifications = crud.get_user_notifications(
+        session,
+        current_user.id,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+    page, next_cursor = split_page(notifications, limit, key=lambda n: (n.created_at, n.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return page
+
+@router.get("/me/notifications/unread-count", response_model=UnreadNotificationCount)
+def get_unread_notification_count(
+    session: SessionDep,
+    current_user: CurrentUserRecord
+):
+    return UnreadNotificationCount(count=crud.count_unread_notifications(session, current_user))
+
+@router.post("/read-all")
+def mark_all_as_read(
     session: SessionDep,
-    current_user: CurrentUser   
+    current_user: CurrentUser
 ):
-    notifications = crud.get_user_notifications(session, current_user.id)
-    return notifications
+    crud.mark_all_notifications_as_read(session, current_user.id)
+    return {"msg": "All notifications marked as read"}
 
 @router.post("/read/{notification_id}")
 def mark_as_read(
@@ -133,9 +174,21 @@ def mark_as_read(
         raise HTTPException(status_code=404, detail="Notification not found")
     return {"msg": "Notification marked as read"}
 
+@router.post("/dismiss/{notification_id}")
+def dismiss(
+    notification_id: uuid.UUID,
+    session: SessionDep,
+    current_user: CurrentUser
+):
+    success = crud.dismiss_notification(session, notification_id, current_user.id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"msg": "Notification dismissed"}
+
 @router.post("/reset-password")
 def reset_password(
     session: SessionDep,
+    background_tasks: BackgroundTasks,
     email: EmailStr = Body(...),
     reset_token: str = Body(...),
     new_password: str = Body(...),
@@ -145,11 +198,35 @@ def reset_password(
     user = session.exec(select(User).where(User.email == email)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    user.hashed_password = get_password_hash(new_password)
-    session.add(user)
-    session.commit()
+    crud.update_user_password(session, user, new_password)
+    invalidate_auth(background_tasks, user.id)
     return {"message": "Password reset successful"}
 
+@router.get("/collectors/leaderboard", response_model=list[LeaderboardEntry])
+def get_collector_leaderboard(
+    session: ReadSessionDep,
+    response: Response,
+    time_window: Literal["7d", "30d", "all"] = Query(default="30d", alias="window"),
+    sort_by: Literal["rating", "orders", "volume"] = "orders",
+    lat: float | None = None,
+    lng: float | None = None,
+    cursor: int | None = Query(default=None, ge=1),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """
+    Top collectors by rating, completed orders or collected volume over a time window,
+    in the area around (lat, lng) or overall. Served from a periodically refreshed materialized view.
+    Pass the X-Next-Cursor response header back as `cursor` to get the next page.
+    """
+    area = leaderboard.area_for(lat, lng) if lat is not None and lng is not None else "all"
+    rows = crud.get_leaderboard_page(
+        session, time_window=time_window, area=area, sort_by=sort_by, after_rank=cursor, limit=limit + 1
+    )
+    page = rows[:limit]
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = str(page[-1].rank)
+    return page
+
 @router.get("/{user_id}", response_model=UserPublic)
 def get_user_by_id(
     user_id: uuid.UUID,
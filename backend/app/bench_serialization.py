@@ -0,0 +1,123 @@
+import argparse
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, List
+
+import fastapi
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.core.serialization import dump_list, list_adapter, prevalidated_list_response
+from app.core.config import settings
+from app.models import Order, OrderItem, OrderStatus, User, UserRole
+from app.schemas.order import OrderPublic, OrderPublicStored
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+# Serialization benchmark for the list endpoints: one page of in-memory orders (with items, owner
+# and collector, as returned by crud.get_orders_by_user) served through the default response_model
+# path and through prevalidated_list_response. No database is needed.
+#   python -m app.bench_serialization --rows 50 --requests 500
+
+
+def make_orders(count: int) -> List[Order]:
+    now = datetime.now(timezone.utc)
+    owner, collector = (
+        User(
+            id=uuid.uuid4(),
+            email=f"{role.value}@example.com",
+            phone_number=phone,
+            full_name=role.value.title(),
+            role=role,
+            avt_url=settings.DEFAULT_AVATAR_URL,
+            hashed_password="x",
+        )
+        for role, phone in ((UserRole.USER, "0900000001"), (UserRole.COLLECTOR, "0900000002"))
+    )
+    orders = []
+    for i in range(count):
+        order = Order(
+            id=uuid.uuid4(),
+            owner_id=owner.id,
+            collector_id=collector.id,
+            status=OrderStatus.PENDING,
+            pickup_address=f"{i} Nguyễn Văn Cừ, Quận 5, TP.HCM",
+            img_url1="https://res.cloudinary.com/demo/image/upload/order1.jpg",
+            img_url2=None,
+            created_at=now,
+            updated_at=now,
+        )
+        order.owner = owner
+        order.collector = collector
+        order.items = [
+            OrderItem(id=uuid.uuid4(), order_id=order.id, category_id=uuid.uuid4(), quantity=1.5 + j)
+            for j in range(3)
+        ]
+        orders.append(order)
+    return orders
+
+
+def time_per_call(fn: Callable[[], object], iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List endpoint serialization benchmark")
+    parser.add_argument("--rows", type=int, default=50, help="rows per page")
+    parser.add_argument("--requests", type=int, default=500, help="requests per mode")
+    args = parser.parse_args()
+
+    orders = make_orders(args.rows)
+
+    # Serialization only. The standard path validates into OrderPublic (EmailStr included), the
+    # prevalidated one into OrderPublicStored, as the order list routes do.
+    adapter = list_adapter(OrderPublic)
+
+    def standard() -> bytes:
+        # What the endpoints did before: build the response_model objects, then encode them.
+        page = [OrderPublic.model_validate(order) for order in orders]
+        return json.dumps(jsonable_encoder(adapter.validate_python(page))).encode()
+
+    def prevalidated() -> bytes:
+        return dump_list(OrderPublicStored, orders)
+
+    base = time_per_call(standard, args.requests)
+    fast = time_per_call(prevalidated, args.requests)
+    logger.info(f"serialize {args.rows} orders: standard {base * 1e3:.3f} ms, prevalidated {fast * 1e3:.3f} ms ({base / fast:.1f}x)")
+
+    # Whole request through FastAPI.
+    app = FastAPI()
+
+    @app.get("/standard", response_model=list[OrderPublic])
+    def standard_route(response: Response):
+        response.headers["X-Next-Cursor"] = "bench"
+        return orders
+
+    @app.get("/prevalidated", response_model=list[OrderPublic])
+    def prevalidated_route(response: Response):
+        response.headers["X-Next-Cursor"] = "bench"
+        return prevalidated_list_response(OrderPublicStored, orders, response)
+
+    # Recent FastAPI releases already dump response_model output with pydantic-core; there
+    # only the per-row validation overhead separates the two routes.
+    logger.info(f"FastAPI {fastapi.__version__}")
+    with TestClient(app) as client:
+        assert client.get("/standard").json() == client.get("/prevalidated").json()
+        for path in ("/standard", "/prevalidated"):
+            per_request = time_per_call(lambda: client.get(path), args.requests)
+            logger.info(f"GET {path}: {1 / per_request:.0f} req/s ({per_request * 1e3:.3f} ms/request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 from datetime import date
 from app.models import UserRole
 from sqlmodel import create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine
+from redis.exceptions import RedisError
+from app.core import sql_metrics
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.redis import redis_client
 from app.schemas.user import UserCreate
 from app.schemas.category import CategoryCreate
 from app import crud
@@ -17,6 +22,81 @@ engine = create_engine(
     pool_recycle=1800,
     )
 
+
+def get_async_database_url(url: str) -> str:
+    """Return the given Postgres URL with its driver swapped for asyncpg."""
+    _, _, rest = url.partition("://")
+    return f"postgresql+asyncpg://{rest}"
+
+
+async_engine = create_async_engine(
+    settings.POSTGRES_ASYNC_URL or get_async_database_url(str(settings.POSTGRES_URL)),
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=1800,
+    )
+
+# Read replica. Without POSTGRES_READ_URL the read engines are simply the primary ones.
+if settings.POSTGRES_READ_URL:
+    read_engine = create_engine(
+        str(settings.POSTGRES_READ_URL),
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+        )
+    async_read_engine = create_async_engine(
+        settings.POSTGRES_READ_ASYNC_URL or get_async_database_url(str(settings.POSTGRES_READ_URL)),
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+        )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+for _engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    sql_metrics.instrument(_engine)
+
+
+# Replication-lag guard: users who wrote within READ_AFTER_WRITE_WINDOW seconds read from the primary.
+# The local cache answers for writes handled by this worker, Redis for writes handled by the others.
+_recent_writers = TTLCache(maxsize=100_000, ttl=settings.READ_AFTER_WRITE_WINDOW)
+
+
+def read_replica_enabled() -> bool:
+    return read_engine is not engine
+
+
+async def mark_recent_write(user_id: str) -> None:
+    if not read_replica_enabled():
+        return
+    _recent_writers.set(user_id, True)
+    try:
+        await redis_client.set(f"db:recent_write:{user_id}", 1, ex=settings.READ_AFTER_WRITE_WINDOW)
+    except RedisError:
+        pass
+
+
+async def has_recent_write(user_id: str) -> bool:
+    if not read_replica_enabled():
+        return False
+    if _recent_writers.get(user_id):
+        return True
+    try:
+        return await redis_client.exists(f"db:recent_write:{user_id}") > 0
+    except RedisError:
+        # Cannot tell: the primary is always consistent.
+        return True
+
 def init_db(session: Session) -> None:
     user = crud.get_user_by_phone_number(session=session, phone_number="0123456789")
     if not user:
@@ -0,0 +1,38 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Callable, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+# Keyset (cursor) pagination on (created_at, id)-style keys.
+# A cursor is the opaque, url-safe encoding of the key of the last row of the previous page.
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor produced by encode_cursor; an invalid cursor is a 400 for the client.
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def split_page(
+    rows: Sequence[T], limit: int, key: Callable[[T], tuple[datetime, uuid.UUID]]
+) -> tuple[list[T], str | None]:
+    """
+    Split rows fetched with `limit + 1` into the page and the cursor of the next page (None on the last page).
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit:
+        return page, encode_cursor(*key(page[-1]))
+    return page, None
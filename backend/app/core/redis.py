@@ -0,0 +1,11 @@
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# Client Redis async dùng chung cho các cache/pub-sub chạy trên event loop.
+redis_client = aioredis.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    decode_responses=True
+)
@@ -0,0 +1,50 @@
+from functools import lru_cache
+from typing import Any, Iterable, List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Fast JSON paths for high-volume list endpoints.
+#
+# By default FastAPI validates whatever the endpoint returns against response_model and only then
+# encodes it. A route opts in by returning prevalidated_list_response(...): the ORM rows are
+# validated once into the public schema and dumped to JSON bytes by pydantic-core (Rust, no
+# intermediate dicts, no json module), and the returned Response skips the response_model step.
+# The response_model stays on the route so the OpenAPI schema is unchanged; the schema passed here
+# may be an internal variant of it that writes the same JSON with less validation (OrderPublicStored).
+
+
+class PrevalidatedJSONResponse(Response):
+    """
+    A body that is already JSON bytes; nothing is validated or encoded again.
+    """
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: type) -> TypeAdapter:
+    # Building a TypeAdapter compiles a validator and a serializer: do it once per schema.
+    return TypeAdapter(List[schema])
+
+
+def dump_list(schema: type, rows: Iterable[Any]) -> bytes:
+    """
+    Validate ORM rows (or dicts) into `schema` and return the JSON array as bytes.
+    """
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def prevalidated_list_response(
+    schema: type, rows: Iterable[Any], response: Response | None = None
+) -> PrevalidatedJSONResponse:
+    """
+    Serialize `rows` as a JSON list of `schema`.
+    Headers set on the injected `response` (pagination cursors...) are carried over, since FastAPI
+    only merges them into responses it builds itself.
+    """
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop("content-length", None)
+    return PrevalidatedJSONResponse(content=dump_list(schema, rows), headers=headers)
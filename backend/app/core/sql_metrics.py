@@ -0,0 +1,84 @@
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestSqlStats:
+    """
+    SQL statements executed while handling one request.
+    """
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated_statements(self) -> list[tuple[str, int]]:
+        """
+        Statements executed at least SQL_N_PLUS_ONE_THRESHOLD times: the usual N+1 signature,
+        e.g. one lazy load or one db.get per row of a list.
+        """
+        return [
+            (statement, times)
+            for statement, times in self.statements.most_common()
+            if times >= settings.SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+
+# Mutable stats object shared with threadpool workers and async tasks through context copies.
+_current_stats: ContextVar[RequestSqlStats | None] = ContextVar("request_sql_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("sql_metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("sql_metrics_start")
+    if not starts:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - starts.pop()
+    stats.statements[statement] += 1
+
+
+def instrument(engine: Engine) -> None:
+    """
+    Count and time every statement the engine executes during a sampled request.
+    For an AsyncEngine, pass its `sync_engine`.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def should_sample() -> bool:
+    return settings.SQL_METRICS_ENABLED and random.random() < settings.SQL_METRICS_SAMPLE_RATE
+
+
+def start_request() -> tuple[RequestSqlStats, Token]:
+    stats = RequestSqlStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+def report(method: str, path: str, stats: RequestSqlStats) -> None:
+    repeated = stats.repeated_statements()
+    for statement, times in repeated:
+        logger.warning(f"Possible N+1 on {method} {path}: statement executed {times} times: {statement}")
+    logger.info(f"{method} {path}: {stats.count} SQL statements in {stats.duration * 1000:.1f} ms")
@@ -1,22 +1,27 @@
-from app.models import Conversation, Review
+from app.models import CollectorStats, Conversation, Review, collector_leaderboard
 import uuid
-import httpx
 from typing import Optional
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
+from app.services import mapbox
 from app.schemas.user import UserCreate, UserPublic, UserUpdate
 from app.schemas.category import CategoryCreate
 from app.schemas.order import OrderItemCreate, OrderCreate
 from app.schemas.notification import NotificationCreate, NotificationPublic, UserNotification
 from app.schemas.chat import ConversationCreate, MessageCreate, MessagePublic
+from app.schemas.review import ReviewCreate
 from app.models import Message, Noti_User, Notification, OrderStatus, User, UserRole, ScrapCategory, Order, OrderItem,Transaction, ConversationMember
 from math import radians, sin, cos, asin, sqrt
 from geoalchemy2.functions import ST_DWithin, ST_Distance
 from shapely.geometry import Point
 from sqlalchemy.sql import func
+from sqlalchemy import delete, false, insert, literal, true, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime
 
 def authenticate(session: Session, phone_number: str, password: str) -> User | None:
     db_user = get_user_by_phone_number(session=session, phone_number=phone_number)
@@ -67,12 +72,26 @@ def get_user_by_id(session: Session, user_id: uuid.UUID) -> User | None:
 
 def update_user(session: Session, user: User, user_update: UserUpdate) -> User:
     user_data = user_update.dict(exclude_unset=True)
+    if "role" in user_data and user_data["role"] != user.role:
+        # Tokens carry the permissions of the old role: revoke them
+        user_data["token_version"] = user.token_version + 1
     current_user = user.sqlmodel_update(user_data)
     session.add(current_user)
     session.commit()
     session.refresh(current_user)
     return current_user
 
+def update_user_password(session: Session, user: User, new_password: str) -> User:
+    """
+    Set a new password and revoke every access token issued with the old one.
+    """
+    user.hashed_password = get_password_hash(new_password)
+    user.token_version += 1
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
 def delete_user(session: Session, user: User) -> None:
     session.delete(user)
     session.commit()
@@ -119,34 +138,70 @@ def update_category_icon(session: Session, category: ScrapCategory, current_user
 def get_order_by_id(session: Session, order_id: uuid.UUID) -> Order:
     return session.get(Order, order_id)
 
-def get_orders_by_user(session: Session, user_id: uuid.UUID) -> list[Order]:
-    statement = select(Order).where(Order.owner_id == user_id)
-    return session.exec(statement).all()
+async def get_order_by_id_async(session: AsyncSession, order_id: uuid.UUID) -> Order | None:
+    # Relationships are loaded up front: lazy loading is not available on an AsyncSession.
+    statement = select(Order).where(Order.id == order_id).options(
+        selectinload(Order.items),
+        selectinload(Order.owner),
+        selectinload(Order.collector),
+    )
+    return (await session.exec(statement)).first()
 
-def get_orders_by_collector(session: Session, collector_id: uuid.UUID) -> list[Order]:
-    statement = select(Order).where(Order.collector_id == collector_id)
-    return session.exec(statement).all()
+def _order_page(
+    statement,
+    status: OrderStatus | None,
+    cursor: tuple[datetime, uuid.UUID] | None,
+    limit: int,
+):
+    """
+    Newest-first keyset page over (created_at, id) with items/owner/collector loaded in
+    one extra query each instead of lazily per order.
+    """
+    if status is not None:
+        statement = statement.where(Order.status == status)
+    if cursor is not None:
+        statement = statement.where(tuple_(Order.created_at, Order.id) < tuple_(*cursor))
+    return (
+        statement
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit)
+        .options(
+            selectinload(Order.items),
+            selectinload(Order.owner),
+            selectinload(Order.collector),
+        )
+    )
 
-async def create_order(session: Session, order_create: OrderCreate, owner_id: uuid.UUID) -> Order:
-    MAPBOX_TOKEN = settings.MAPBOX_ACCESS_TOKEN
+def get_orders_by_user(
+    session: Session,
+    user_id: uuid.UUID,
+    status: OrderStatus | None = None,
+    cursor: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> list[Order]:
+    statement = select(Order).where(Order.owner_id == user_id)
+    return session.exec(_order_page(statement, status, cursor, limit)).all()
+
+def get_orders_by_collector(
+    session: Session,
+    collector_id: uuid.UUID,
+    status: OrderStatus | None = None,
+    cursor: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> list[Order]:
+    statement = select(Order).where(Order.collector_id == collector_id)
+    return session.exec(_order_page(statement, status, cursor, limit)).all()
 
+async def create_order(session: AsyncSession, order_create: OrderCreate, owner_id: uuid.UUID) -> Order:
     address = order_create.pickup_address
-    geocode_url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{address}.json?access_token={MAPBOX_TOKEN}&limit=1"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(geocode_url)
-        data = resp.json()
-        if "features" not in data:
-            raise ValueError(f"Mapbox API error: {data}")   
-        if not data["features"]:
-            raise ValueError(f"Could not find coordinates for address: {address}")
-        coords = data["features"][0]["geometry"]["coordinates"]  # [lng, lat]
+    coords = await mapbox.geocode_address(address)
+    if not coords:
+        raise ValueError(f"Could not find coordinates for address: {address}")
 
     # Convert coordinates to WKT for PostGIS
-    point = Point(coords[0], coords[1])
+    point = Point(coords["lng"], coords["lat"])
     location_wkt = f'SRID=4326;{point.wkt}'
 
-
-
     db_order = Order.model_validate(
         order_create,
         update={
@@ -156,9 +211,8 @@ async def create_order(session: Session, order_create: OrderCreate, owner_id: uu
         }
     )
     session.add(db_order)
-    session.commit()
-    session.refresh(db_order)
-    return db_order
+    await session.commit()
+    return await get_order_by_id_async(session, db_order.id)
 
 def add_order_item(session: Session, order_id: uuid.UUID, item: OrderItemCreate) -> None:
     db_item = OrderItem.model_validate(item, update={"order_id": order_id})
@@ -236,6 +290,33 @@ def get_nearby_pending_orders_candidates(
     
     return query.all()
 
+async def get_nearby_pending_orders_candidates_async(
+    db: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float = 50.0,
+    limit: int = 10
+) -> list[tuple[Order, float]]:
+    """
+    Async variant of get_nearby_pending_orders_candidates for the event-loop endpoints.
+    """
+    collector_location = func.ST_GeomFromEWKT(f'SRID=4326;POINT({longitude} {latitude})')
+    radius_meters = radius_km * 1000
+
+    distance_expression = (func.ST_Distance(
+        Order.location,
+        collector_location
+    ) / 1000).label("distance_km")
+
+    statement = select(Order, distance_expression).where(
+        Order.status == OrderStatus.PENDING,
+        Order.collector_id == None,
+        ST_DWithin(Order.location, collector_location, radius_meters)
+    ).order_by(distance_expression).limit(limit)
+
+    result = await db.exec(statement)
+    return result.all()
+
 
 
 
@@ -288,6 +369,11 @@ def complete_order_payment_service(
         order_to_complete.status = OrderStatus.COMPLETED
         order_to_complete.total_amount_paid = final_total_amount
         db.add(order_to_complete)
+        db.flush()
+        total_quantity = db.exec(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.order_id == order_id)
+        ).one()
+        bump_collector_stats(db, collector.id, completed_orders=1, total_quantity=total_quantity)
         
         # Step 5: Create the financial Transaction record.
         new_transaction = Transaction(
@@ -318,61 +404,211 @@ def complete_order_payment_service(
 def create_notification(session: Session, notification_create: NotificationCreate, user_ids: list[uuid.UUID]) -> Notification:
     db_notification = Notification.model_validate(notification_create)
     session.add(db_notification)
+    session.flush()
+    if user_ids:
+        user_ids = list(dict.fromkeys(user_ids))
+        # One multi-row INSERT instead of one ORM object per recipient
+        session.execute(
+            insert(Noti_User),
+            [{"notification_id": db_notification.id, "user_id": user_id} for user_id in user_ids],
+        )
+        session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(unread_notification_count=User.unread_notification_count + 1)
+        )
     session.commit()
     session.refresh(db_notification)
-    for user_id in user_ids:
-        noti_user = Noti_User(notification_id=db_notification.id, user_id=user_id)
-        session.add(noti_user)
-    session.commit()
     return db_notification
 
-def create_notification_to_all(session: Session, notification_create: NotificationCreate) -> Notification:
-    db_notification = Notification.model_validate(notification_create)
+async def create_notification_to_all(session: AsyncSession, notification_create: NotificationCreate) -> Notification:
+    """
+    Store a broadcast notification. With NOTIFICATION_GLOBAL_BROADCASTS it is global and needs no recipients;
+    otherwise recipients are added afterwards, chunk by chunk, with add_notification_recipients_chunk
+    (see app.services.notification_jobs).
+    """
+    db_notification = Notification.model_validate(
+        notification_create, update={"is_global": settings.NOTIFICATION_GLOBAL_BROADCASTS}
+    )
     session.add(db_notification)
-    session.commit()
-    session.refresh(db_notification)
-    stmt = select(User.id)
-    user_ids = [user_id for user_id in session.exec(stmt).all()]
-    for user_id in user_ids:
-        noti_user = Noti_User(notification_id=db_notification.id, user_id=user_id)
-        session.add(noti_user)
-    session.commit()
+    await session.commit()
     return db_notification
 
+async def count_users_async(session: AsyncSession) -> int:
+    return (await session.exec(select(func.count()).select_from(User))).one()
+
+async def add_notification_recipients_chunk(
+    session: AsyncSession, notification_id: uuid.UUID, after_user_id: uuid.UUID | None, chunk_size: int
+) -> tuple[int, uuid.UUID | None]:
+    """
+    Add the next `chunk_size` users (by id, after `after_user_id`) as recipients with one INSERT ... SELECT.
+    Returns the number of rows inserted and the last user id of the chunk, or None once every user is covered.
+    """
+    users = select(User.id)
+    if after_user_id is not None:
+        users = users.where(User.id > after_user_id)
+    last_user_id = (await session.exec(users.order_by(User.id).offset(chunk_size - 1).limit(1))).first()
+
+    recipients = select(literal(notification_id), User.id, false(), func.now())
+    if after_user_id is not None:
+        recipients = recipients.where(User.id > after_user_id)
+    if last_user_id is not None:
+        recipients = recipients.where(User.id <= last_user_id)
+    inserted = (
+        pg_insert(Noti_User)
+        .from_select(["notification_id", "user_id", "is_read", "created_at"], recipients)
+        .on_conflict_do_nothing()
+        .returning(Noti_User.user_id)
+        .cte("inserted")
+    )
+    # The unread counters of the users actually inserted are bumped by the same statement
+    stmt = (
+        update(User)
+        .where(User.id == inserted.c.user_id)
+        .values(unread_notification_count=User.unread_notification_count + 1)
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount, last_user_id
+
 def get_all_notifications(session: Session) -> list[Notification]:
     stmt = select(Notification)
     return session.exec(stmt).all()
 
-def get_user_notifications(session: Session, user_id: uuid.UUID) -> list[UserNotification]:
-    stmt = select(
+def _visible_global_notifications(user_id: uuid.UUID):
+    """
+    Condition for the global notifications a user sees: important ones always,
+    the others only if sent after the user signed up (as when broadcasts were copied per user).
+    """
+    user_created_at = select(User.created_at).where(User.id == user_id).scalar_subquery()
+    return (Notification.is_global == True) & (
+        (Notification.is_important == True) | (Notification.created_at >= user_created_at)
+    )
+
+def _user_inbox(user_id: uuid.UUID):
+    """
+    Personal notifications (Noti_User rows, minus dismissed ones) merged with the visible
+    global ones the user has no row for yet.
+    """
+    personal = select(
         Notification.id,
         Notification.title,
         Notification.message,
         Noti_User.is_read,
         Noti_User.created_at
-    ).join(Noti_User).where(Noti_User.user_id == user_id)
-    return session.exec(stmt).all()
+    ).join(Noti_User).where(Noti_User.user_id == user_id, Noti_User.is_dismissed == False)
+    global_ = select(
+        Notification.id,
+        Notification.title,
+        Notification.message,
+        false().label("is_read"),
+        Notification.created_at
+    ).where(_unseen_global_notifications(user_id))
+    return union_all(personal, global_).subquery("inbox")
+
+def _unseen_global_notifications(user_id: uuid.UUID):
+    has_state = select(Noti_User.notification_id).where(
+        Noti_User.notification_id == Notification.id, Noti_User.user_id == user_id
+    ).exists()
+    return _visible_global_notifications(user_id) & ~has_state
+
+def get_user_notifications(
+    session: Session,
+    user_id: uuid.UUID,
+    cursor: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 50,
+) -> list[UserNotification]:
+    """
+    Newest-first keyset page of the user's inbox over (created_at, id).
+    """
+    inbox = _user_inbox(user_id)
+    statement = select(inbox)
+    if cursor is not None:
+        statement = statement.where(tuple_(inbox.c.created_at, inbox.c.id) < tuple_(*cursor))
+    statement = statement.order_by(inbox.c.created_at.desc(), inbox.c.id.desc()).limit(limit)
+    return session.exec(statement).all()
+
+def count_unread_notifications(session: Session, user: User) -> int:
+    """
+    The user's unread counter (personal rows) plus the few global notifications they have not touched yet.
+    """
+    statement = select(func.count()).select_from(Notification).where(_unseen_global_notifications(user.id))
+    return user.unread_notification_count + session.exec(statement).one()
+
+def _add_unread(session: Session, user_id: uuid.UUID, delta: int) -> None:
+    session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(unread_notification_count=User.unread_notification_count + delta)
+    )
 
+def _get_or_create_noti_user(session: Session, notification_id: uuid.UUID, user_id: uuid.UUID) -> Noti_User | None:
+    """
+    The user's state row for a notification; for a visible global notification it is created on first use.
+    """
+    noti_user = session.get(Noti_User, (notification_id, user_id))
+    if noti_user:
+        return noti_user
+    stmt = select(Notification.created_at).where(Notification.id == notification_id, _visible_global_notifications(user_id))
+    created_at = session.exec(stmt).first()
+    if created_at is None:
+        return None
+    # Marked read and not counted yet: unseen global notifications are counted by count_unread_notifications.
+    # created_at is the notification's, so the row keeps its place (and its cursor) in the inbox.
+    return Noti_User(notification_id=notification_id, user_id=user_id, is_read=True, created_at=created_at)
 
 def mark_notification_as_read(session: Session, notification_id: uuid.UUID, user_id: uuid.UUID) -> bool:
-    stmt = select(Noti_User).where(
-        Noti_User.notification_id == notification_id,
-        Noti_User.user_id == user_id
-    )
-    noti_user = session.exec(stmt).first()
+    noti_user = _get_or_create_noti_user(session, notification_id, user_id)
     if not noti_user:
         return False
+    if not noti_user.is_read and not noti_user.is_dismissed:
+        _add_unread(session, user_id, -1)
     noti_user.is_read = True
     session.add(noti_user)
     session.commit()
     return True
 
+def dismiss_notification(session: Session, notification_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    noti_user = _get_or_create_noti_user(session, notification_id, user_id)
+    if not noti_user:
+        return False
+    if not noti_user.is_read and not noti_user.is_dismissed:
+        _add_unread(session, user_id, -1)
+    noti_user.is_dismissed = True
+    session.add(noti_user)
+    session.commit()
+    return True
+
+def mark_all_notifications_as_read(session: Session, user_id: uuid.UUID) -> None:
+    """
+    Set-based: one UPDATE for the personal rows, one INSERT ... SELECT for the untouched global notifications.
+    """
+    session.execute(
+        update(Noti_User)
+        .where(Noti_User.user_id == user_id, Noti_User.is_read == False)
+        .values(is_read=True)
+    )
+    # created_at is copied from the notification so that the inbox order and its cursors don't change
+    unseen_globals = select(Notification.id, literal(user_id), true(), Notification.created_at).where(
+        _unseen_global_notifications(user_id)
+    )
+    session.execute(
+        pg_insert(Noti_User)
+        .from_select(["notification_id", "user_id", "is_read", "created_at"], unseen_globals)
+        .on_conflict_do_nothing()
+    )
+    session.execute(update(User).where(User.id == user_id).values(unread_notification_count=0))
+    session.commit()
+
 def add_noti_to_new_user(session: Session, user_id: uuid.UUID):
-    stmt = select(Notification).where(Notification.is_important == True)
+    # Global notifications need no per-user copy; only legacy, non-global important ones are copied.
+    stmt = select(Notification).where(Notification.is_important == True, Notification.is_global == False)
     important_notifications = session.exec(stmt).all()
     for notification in important_notifications:
         noti_user = Noti_User(notification_id=notification.id, user_id=user_id)
         session.add(noti_user)
+    if important_notifications:
+        _add_unread(session, user_id, len(important_notifications))
 
 def update_order_img(sesion: Session, order_id: uuid.UUID, img_url1: Optional[str] = None, img_url2: Optional[str] = None) -> Order:
     order = sesion.get(Order, order_id)
@@ -399,11 +635,122 @@ def get_user_reviews(session: Session, user_id: uuid.UUID):
     return reviews
 
 def get_user_average_rating(session: Session, user_id: uuid.UUID):
-    reviews = get_user_reviews(session, user_id)
-    if reviews:
-        return sum(r.rating for r in reviews) / len(reviews)
+    stats = session.get(CollectorStats, user_id)
+    if stats and stats.rating_count:
+        return stats.rating_sum / stats.rating_count
     return None
 
+def bump_collector_stats(session: Session, collector_id: uuid.UUID, **deltas) -> None:
+    """
+    Add `deltas` (rating_sum, rating_count, completed_orders, total_quantity) to the collector's stats row,
+    creating it if needed. A single atomic upsert; commits with the caller's transaction.
+    """
+    stmt = pg_insert(CollectorStats).values(collector_id=collector_id, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CollectorStats.collector_id],
+        set_={
+            **{name: getattr(CollectorStats, name) + getattr(stmt.excluded, name) for name in deltas},
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+def create_review(session: Session, order: Order, user_id: uuid.UUID, review_create: ReviewCreate) -> Review:
+    db_review = Review(
+        user_id=user_id,
+        order_id=order.id,
+        rating=review_create.rating,
+        comment=review_create.comment
+    )
+    session.add(db_review)
+    bump_collector_stats(session, order.collector_id, rating_sum=review_create.rating, rating_count=1)
+    session.commit()
+    session.refresh(db_review)
+    return db_review
+
+def get_collector_profile(session: Session, collector_id: uuid.UUID) -> tuple[User, CollectorStats | None] | None:
+    """
+    The collector and their stats in one query.
+    """
+    statement = (
+        select(User, CollectorStats)
+        .outerjoin(CollectorStats, CollectorStats.collector_id == User.id)
+        .where(User.id == collector_id)
+    )
+    return session.exec(statement).first()
+
+def rebuild_collector_stats(session: Session) -> int:
+    """
+    Recompute every collector's stats from orders, order items and reviews, set-based.
+    Returns the number of collectors with stats.
+    """
+    completed = (Order.status == OrderStatus.COMPLETED) & (Order.collector_id != None)
+    orders = (
+        select(Order.collector_id, func.count(Order.id).label("completed_orders"))
+        .where(completed)
+        .group_by(Order.collector_id)
+        .subquery()
+    )
+    quantities = (
+        select(Order.collector_id, func.sum(OrderItem.quantity).label("total_quantity"))
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(completed)
+        .group_by(Order.collector_id)
+        .subquery()
+    )
+    ratings = (
+        select(
+            Order.collector_id,
+            func.sum(Review.rating).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+        )
+        .join(Review, Review.order_id == Order.id)
+        .where(completed)
+        .group_by(Order.collector_id)
+        .subquery()
+    )
+    rows = (
+        select(
+            orders.c.collector_id,
+            func.coalesce(ratings.c.rating_sum, 0),
+            func.coalesce(ratings.c.rating_count, 0),
+            orders.c.completed_orders,
+            func.coalesce(quantities.c.total_quantity, 0),
+            func.now(),
+        )
+        .outerjoin(quantities, quantities.c.collector_id == orders.c.collector_id)
+        .outerjoin(ratings, ratings.c.collector_id == orders.c.collector_id)
+    )
+    session.execute(delete(CollectorStats))
+    result = session.execute(
+        insert(CollectorStats).from_select(
+            ["collector_id", "rating_sum", "rating_count", "completed_orders", "total_quantity", "updated_at"], rows
+        )
+    )
+    session.commit()
+    return result.rowcount
+
+
+def get_leaderboard_page(
+    session: Session,
+    time_window: str,
+    area: str,
+    sort_by: str,
+    after_rank: int | None = None,
+    limit: int = 20,
+):
+    """
+    One index range scan on the materialized leaderboard: ranks after `after_rank` for the window and area.
+    """
+    rank = collector_leaderboard.c[f"{sort_by}_rank"]
+    statement = select(collector_leaderboard, rank.label("rank")).where(
+        collector_leaderboard.c.time_window == time_window,
+        collector_leaderboard.c.area == area,
+    )
+    if after_rank is not None:
+        statement = statement.where(rank > after_rank)
+    return session.exec(statement.order_by(rank).limit(limit)).all()
+
 
 # ============================== Chat CRUD ====================================================
 
@@ -421,6 +768,23 @@ def create_conversation(session: Session, conversation_create: ConversationCreat
     session.refresh(new_convo)
     return new_convo
 
+def _message_read_state_updates(message: Message):
+    """
+    Read state changes of a new message: +1 unread for the other members, and the sender's
+    pointer moves to their own message.
+    """
+    others = (
+        update(ConversationMember)
+        .where(ConversationMember.conversation_id == message.conversation_id, ConversationMember.user_id != message.sender_id)
+        .values(unread_count=ConversationMember.unread_count + 1)
+    )
+    sender = (
+        update(ConversationMember)
+        .where(ConversationMember.conversation_id == message.conversation_id, ConversationMember.user_id == message.sender_id)
+        .values(last_read_message_id=message.id, last_read_at=message.created_at, unread_count=0)
+    )
+    return others, sender
+
 def create_message(*, session: Session, message_create: MessageCreate, sender_id: uuid.UUID) -> Message:
     db_message = Message.model_validate(message_create, update={"sender_id": sender_id})
     session.add(db_message)
@@ -428,10 +792,40 @@ def create_message(*, session: Session, message_create: MessageCreate, sender_id
     if db_conversation:
         db_conversation.last_message_id = db_message.id
         session.add(db_conversation)
+    session.flush()
+    for statement in _message_read_state_updates(db_message):
+        session.execute(statement)
     session.commit()
     session.refresh(db_message)
     return db_message
 
+async def create_conversation_async(session: AsyncSession, conversation_create: ConversationCreate, user_id: uuid.UUID) -> Conversation:
+    conversation_in = conversation_create.dict(exclude={"member_ids"})
+    new_convo = Conversation.model_validate(conversation_in)
+    session.add(new_convo)
+
+    member_ids = set(conversation_create.member_ids)
+    member_ids.add(user_id)
+    for member_id in member_ids:
+        conversation_member = ConversationMember(conversation_id=new_convo.id, user_id=member_id)
+        session.add(conversation_member)
+    await session.commit()
+    return await get_conversation_with_members_async(session, new_convo.id)
+
+async def create_message_async(*, session: AsyncSession, message_create: MessageCreate, sender_id: uuid.UUID) -> Message:
+    db_message = Message.model_validate(message_create, update={"sender_id": sender_id})
+    session.add(db_message)
+    db_conversation = await session.get(Conversation, message_create.conversation_id)
+    if db_conversation:
+        db_conversation.last_message_id = db_message.id
+        session.add(db_conversation)
+    await session.flush()
+    for statement in _message_read_state_updates(db_message):
+        await session.execute(statement)
+    await session.commit()
+    await session.refresh(db_message)
+    return db_message
+
 def get_conversation_by_id(session: Session, conversation_id: uuid.UUID) -> Conversation | None:
     return session.get(Conversation, conversation_id)
 
@@ -439,24 +833,81 @@ def get_conversation_members(session: Session, conversation_id: uuid.UUID) -> li
     statement = select(ConversationMember).where(ConversationMember.conversation_id == conversation_id)
     return session.exec(statement).all()
 
+async def get_conversation_members_async(session: AsyncSession, conversation_id: uuid.UUID) -> list[ConversationMember]:
+    statement = select(ConversationMember).where(ConversationMember.conversation_id == conversation_id)
+    return (await session.exec(statement)).all()
+
+async def get_conversation_with_members_async(session: AsyncSession, conversation_id: uuid.UUID) -> Conversation | None:
+    statement = (
+        select(Conversation)
+        .where(Conversation.id == conversation_id)
+        .options(selectinload(Conversation.last_message))
+        .options(selectinload(Conversation.members))
+    )
+    return (await session.exec(statement)).first()
+
 def get_user_conversations(session: Session, user_id: uuid.UUID) -> list[Conversation]:
     statement = select(Conversation).join(ConversationMember).where(ConversationMember.user_id == user_id).order_by(Conversation.updated_at.desc())
     return session.exec(statement).all()
 
-def get_messages_by_conversation(session: Session, conversation_id: uuid.UUID) -> list[Message]:
-    statement = select(Message).where(Message.conversation_id == conversation_id).order_by(Message.created_at.asc())
-    return session.exec(statement).all()
-
-def mark_messages_as_read(session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID) -> None:
-    statement = select(Message).where(
-        Message.conversation_id == conversation_id,
-        Message.sender_id != user_id
+def _message_page(
+    conversation_id: uuid.UUID,
+    limit: int,
+    before: tuple[datetime, uuid.UUID] | None,
+    after: tuple[datetime, uuid.UUID] | None,
+):
+    """
+    One index range scan on (conversation_id, created_at, id):
+    - default / `before`: the newest `limit` messages (older than `before`), newest first;
+    - `after`: the oldest `limit` messages newer than `after`, oldest first.
+    """
+    key = tuple_(Message.created_at, Message.id)
+    statement = select(Message).where(Message.conversation_id == conversation_id)
+    if after is not None:
+        return statement.where(key > tuple_(*after)).order_by(Message.created_at.asc(), Message.id.asc()).limit(limit)
+    if before is not None:
+        statement = statement.where(key < tuple_(*before))
+    return statement.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+
+def get_messages_by_conversation(
+    session: Session,
+    conversation_id: uuid.UUID,
+    limit: int = 50,
+    before: tuple[datetime, uuid.UUID] | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Message]:
+    return session.exec(_message_page(conversation_id, limit, before, after)).all()
+
+async def get_messages_by_conversation_async(
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    limit: int = 50,
+    before: tuple[datetime, uuid.UUID] | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Message]:
+    return (await session.exec(_message_page(conversation_id, limit, before, after))).all()
+
+def _mark_read_statement(conversation_id: uuid.UUID, user_id: uuid.UUID):
+    """
+    One UPDATE moving the member's read pointer to the conversation's last message, whatever the history size.
+    """
+    last_message_id = select(Conversation.last_message_id).where(Conversation.id == conversation_id).scalar_subquery()
+    return (
+        update(ConversationMember)
+        .where(ConversationMember.conversation_id == conversation_id, ConversationMember.user_id == user_id)
+        .values(last_read_message_id=last_message_id, last_read_at=func.now(), unread_count=0)
+        .returning(ConversationMember)
     )
-    messages = session.exec(statement).all()
-    for message in messages:
-        message.is_read = True
-        session.add(message)
+
+def mark_messages_as_read(session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID) -> ConversationMember | None:
+    member = session.exec(_mark_read_statement(conversation_id, user_id)).scalars().first()
     session.commit()
+    return member
+
+async def mark_messages_as_read_async(session: AsyncSession, conversation_id: uuid.UUID, user_id: uuid.UUID) -> ConversationMember | None:
+    member = (await session.exec(_mark_read_statement(conversation_id, user_id))).scalars().first()
+    await session.commit()
+    return member
 
 def get_user_conversations_and_last_message(session: Session, user_id: uuid.UUID) -> list[Conversation]:
     statement = (
@@ -469,5 +920,31 @@ def get_user_conversations_and_last_message(session: Session, user_id: uuid.UUID
     conversations = session.exec(statement).all()
     return conversations
 
+async def get_user_conversation_inbox_async(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    cursor: tuple[datetime, uuid.UUID] | None = None,
+    limit: int = 20,
+) -> list[tuple[Conversation, int]]:
+    """
+    Most recently active conversations first, keyset-paginated on (updated_at, id), each with the
+    caller's unread count. Three queries per page: the page itself, last messages and members.
+    """
+    statement = (
+        select(Conversation, ConversationMember.unread_count)
+        .join(ConversationMember)
+        .where(ConversationMember.user_id == user_id)
+    )
+    if cursor is not None:
+        statement = statement.where(tuple_(Conversation.updated_at, Conversation.id) < tuple_(*cursor))
+    statement = (
+        statement
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(limit)
+        .options(selectinload(Conversation.last_message))
+        .options(selectinload(Conversation.members))
+    )
+    return (await session.exec(statement)).all()
+
 # ============================== End Chat CRUD ====================================================
 
@@ -1,11 +1,86 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from app.core.config import settings
 
 from app.api.router import api_router
+from app.core import db, security, sql_metrics
+from app.core.redis import redis_client
+from app.services import auth_cache, category_cache, mapbox
+from app.services.broker import broker
+from app.services.location_buffer import location_buffer
+from app.services.order_feed import order_feed
+from app.services.leaderboard import leaderboard_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await mapbox.start_client()
+    await broker.start()
+    await order_feed.start()
+    await category_cache.start()
+    await auth_cache.start()
+    await location_buffer.start()
+    await leaderboard_refresher.start()
+    yield
+    await leaderboard_refresher.stop()
+    await location_buffer.stop()
+    await auth_cache.stop()
+    await category_cache.stop()
+    await order_feed.stop()
+    await broker.stop()
+    await mapbox.close_client()
+    await redis_client.aclose()
+
 
 app = FastAPI(
-    title=settings.PROJECT_NAME
+    title=settings.PROJECT_NAME,
+    lifespan=lifespan
 )
 
-app.include_router(api_router, prefix=settings.API_STR)
 
+@app.middleware("http")
+async def route_reads_after_writes(request: Request, call_next):
+    """
+    Replication-lag guard for ReadSessionDep: a user who wrote within
+    READ_AFTER_WRITE_WINDOW seconds keeps reading from the primary.
+    """
+    if not db.read_replica_enabled():
+        return await call_next(request)
+
+    user_id = None
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        user_id = security.get_token_subject(auth_header.split(" ")[1])
+    request.state.read_from_primary = user_id is not None and await db.has_recent_write(user_id)
+
+    response = await call_next(request)
+    if user_id and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        await db.mark_recent_write(user_id)
+    return response
+
+
+@app.middleware("http")
+async def collect_sql_metrics(request: Request, call_next):
+    """
+    Count and time the SQL statements of a sampled request, report them in X-DB-* headers
+    and the log, and flag statements repeated often enough to look like an N+1.
+    """
+    if not sql_metrics.should_sample():
+        return await call_next(request)
+
+    stats, token = sql_metrics.start_request()
+    try:
+        response = await call_next(request)
+    finally:
+        sql_metrics.end_request(token)
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Query-Time-Ms"] = f"{stats.duration * 1000:.1f}"
+    repeated = stats.repeated_statements()
+    if repeated:
+        response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+    sql_metrics.report(request.method, request.url.path, stats)
+    return response
+
+
+app.include_router(api_router, prefix=settings.API_STR)
@@ -5,7 +5,7 @@ from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
-from sqlalchemy import Column
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, Uuid
 class UserRole(str, Enum):
     ADMIN = "admin"
     USER = "user"
@@ -25,6 +25,10 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"onupdate": func.now()})
     current_location: Optional[Any] = Field(sa_column=Column(Geometry(geometry_type="POINT", srid=4326), nullable=True), default=None)
+    # Unread, non-dismissed Noti_User rows; maintained by the notification functions in crud
+    unread_notification_count: int = Field(default=0)
+    # Carried as the "ver" claim of access tokens; bumping it revokes every token issued before
+    token_version: int = Field(default=0)
 
     orders: List["Order"] = Relationship(
         back_populates="owner", 
@@ -81,6 +85,12 @@ class OrderStatus(str, Enum):
     CANCELLED = "cancelled"
 
 class Order(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination of order listings: owner/collector + (created_at, id)
+        Index("ix_order_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_order_collector_id_created_at_id", "collector_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(foreign_key="user.id", index=True)
     pickup_address: str = Field(max_length=255, nullable=True)
@@ -128,6 +138,19 @@ class Review(SQLModel, table=True):
     order: "Order" = Relationship(back_populates="review")
 
 
+class CollectorStats(SQLModel, table=True):
+    """
+    Denormalized collector profile statistics, maintained in the same transaction as reviews and
+    order completions (see crud.bump_collector_stats); rebuild with `python -m app.rebuild_collector_stats`.
+    """
+    collector_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+    completed_orders: int = Field(default=0)
+    total_quantity: float = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"onupdate": func.now()})
+
+
 class TransactionMethod(str, Enum):
     CASH = "cash"
     WALLET = "wallet"
@@ -160,6 +183,8 @@ class Notification(SQLModel, table=True):
     title: str
     message: str
     is_important: bool = Field(default=False)
+    # Global notifications are stored once; Noti_User rows only hold per-user read/dismiss state
+    is_global: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now, sa_column_kwargs={"onupdate": func.now()})
 
@@ -169,16 +194,27 @@ class Noti_User(SQLModel, table=True):
     notification_id: uuid.UUID = Field(foreign_key="notification.id", ondelete="CASCADE", primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
     is_read: bool = Field(default=False)
+    is_dismissed: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.now)
 
     notification: "Notification" = Relationship(back_populates="recipients")
     recipient: "User" = Relationship(back_populates="notifications")
 
+    __table_args__ = (
+        # Inbox: a user's notifications, newest first
+        Index("ix_noti_user_user_id_created_at", "user_id", "created_at"),
+    )
+
 class ConversationType(str, Enum):
     PRIVATE = "private"
     GROUP = "group"
 
 class Conversation(SQLModel, table=True):
+    __table_args__ = (
+        # Conversation inbox: most recently active first on (updated_at, id)
+        Index("ix_conversation_updated_at_id", "updated_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     name: str | None = Field(default=None, max_length=100, nullable=True)
     type: ConversationType = Field(default=ConversationType.PRIVATE, max_length=20)
@@ -195,9 +231,17 @@ class Conversation(SQLModel, table=True):
     last_message: "Message" = Relationship(sa_relationship_kwargs={"foreign_keys": "Conversation.last_message_id"})
 
 class ConversationMember(SQLModel, table=True):
+    __table_args__ = (
+        # Conversation inbox: the conversations of one user
+        Index("ix_conversationmember_user_id", "user_id"),
+    )
+
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
     unread_count: int = Field(default=0)
+    # Read pointer: everything up to this message has been read by the member
+    last_read_message_id: uuid.UUID | None = Field(default=None, foreign_key="message.id")
+    last_read_at: datetime | None = Field(default=None)
 
     conversation: "Conversation" = Relationship(
         back_populates="members",
@@ -210,6 +254,11 @@ class ConversationMember(SQLModel, table=True):
 
 
 class Message(SQLModel, table=True):
+    __table_args__ = (
+        # Chat history pages: a single range scan per conversation on (created_at, id)
+        Index("ix_message_conversation_id_created_at_id", "conversation_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", index=True)
     sender_id: uuid.UUID = Field(foreign_key="user.id", index=True)
@@ -223,4 +272,24 @@ class Message(SQLModel, table=True):
         back_populates="messages",
         sa_relationship_kwargs={"foreign_keys": "Message.conversation_id"}
     )
-    sender: "User" = Relationship(sa_relationship_kwargs={"foreign_keys": "Message.sender_id"})
\ No newline at end of file
+    sender: "User" = Relationship(sa_relationship_kwargs={"foreign_keys": "Message.sender_id"})
+
+
+# Materialized view created and indexed by migration 1b7e3c5a9d42 and refreshed by app.services.leaderboard.
+# Kept out of SQLModel.metadata so that create_all/autogenerate never treat it as a table.
+collector_leaderboard = Table(
+    "collector_leaderboard",
+    MetaData(),
+    Column("time_window", String, primary_key=True),
+    Column("area", String, primary_key=True),
+    Column("collector_id", Uuid, primary_key=True),
+    Column("full_name", String),
+    Column("avt_url", String),
+    Column("completed_orders", Integer),
+    Column("total_quantity", Float),
+    Column("average_rating", Float),
+    Column("rating_count", Integer),
+    Column("rating_rank", Integer),
+    Column("orders_rank", Integer),
+    Column("volume_rank", Integer),
+)
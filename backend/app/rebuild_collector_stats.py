@@ -0,0 +1,20 @@
+import logging
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    logger.info("Rebuilding collector stats")
+    with Session(engine) as session:
+        count = crud.rebuild_collector_stats(session)
+    logger.info(f"Collector stats rebuilt for {count} collectors")
+
+
+if __name__ == "__main__":
+    main()
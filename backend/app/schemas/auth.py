@@ -1,10 +1,23 @@
+import uuid
 from datetime import timedelta
 from sqlmodel import SQLModel, Field
 from pydantic import validator
+from app.models import UserRole
 
 class TokenPayLoad(SQLModel):
     sub: str = Field(min_length=1)
     exp: int = Field(gt=0)
+    # Tokens issued before token versions existed have no "ver" claim: they are version 0
+    ver: int = Field(default=0, ge=0)
+
+
+class AuthUser(SQLModel):
+    """
+    What authorization needs to know about the caller, cached in process (app/services/auth_cache.py).
+    """
+    id: uuid.UUID
+    role: UserRole
+    token_version: int
 
 
 class Token(SQLModel):
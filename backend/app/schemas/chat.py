@@ -22,6 +22,12 @@ class ConversationCreate(ConversationBase):
 
 class ConversationMember(BaseModel):
     user_id: uuid.UUID
+    last_read_message_id: uuid.UUID | None = None
+    last_read_at: datetime | None = None
+
+class ReadStatePublic(ConversationMember):
+    conversation_id: uuid.UUID
+    unread_count: int
 
 class ConversationPublic(ConversationBase):
     id: uuid.UUID
@@ -31,6 +37,9 @@ class ConversationPublic(ConversationBase):
     created_at: datetime
     updated_at: datetime
 
+class ConversationInboxPublic(ConversationPublic):
+    unread_count: int = 0
+
 class MessageCreate(MessageBase):
     pass
 
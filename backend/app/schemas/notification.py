@@ -15,11 +15,21 @@ class NotificationPublic(NotificationBase):
     created_at: datetime
     updated_at: datetime
 
+class NotificationJobPublic(BaseModel):
+    id: UUID
+    notification_id: UUID
+    status: str
+    total: int
+    done: int
+
 class UserNotification(NotificationBase):
     id: UUID
     is_read: bool
     created_at: datetime
 
+class UnreadNotificationCount(BaseModel):
+    count: int
+
 class NotiUserBase(BaseModel):
     notification_id: UUID
     user_id: UUID
@@ -7,7 +7,7 @@ from pydantic import field_validator
 from geoalchemy2.elements import WKBElement
 from geoalchemy2.shape import to_shape
 from shapely.geometry import mapping
-from app.schemas.user import UserPublic
+from app.schemas.user import UserPublic, UserPublicStored
 
 class OrderCreate(SQLModel):
     pickup_address: str = Field(min_length=10, max_length=500)
@@ -33,6 +33,11 @@ class OrderPublic(SQLModel):
             return mapping(to_shape(v))
         return v
 
+class OrderPublicStored(OrderPublic):
+    # OrderPublic for prevalidated_list_response; the route keeps response_model=list[OrderPublic].
+    owner: Optional[UserPublicStored] = None
+    collector: Optional[UserPublicStored] = None
+
 class OrderItemCreate(SQLModel):
     category_id: uuid.UUID
     quantity: float
@@ -51,6 +56,9 @@ class OrderItemPublic(SQLModel):
 
 class OrderAcceptRequest(SQLModel):
     note: str | None = None
+    # Collector's position when accepting, used to precompute the route to the order
+    lat: float | None = None
+    lng: float | None = None
 
 class OrderAcceptResponse(SQLModel):
     id: uuid.UUID
@@ -62,3 +70,14 @@ class NearbyOrderPublic(OrderPublic):
     distance_km: float
     travel_time_seconds: Optional[float] = None 
     travel_distance_meters: Optional[float] = None 
+
+class NearbyCollectorPublic(SQLModel):
+    collector_id: uuid.UUID
+    distance_km: float
+    lat: float
+    lng: float
+
+class OrderFeedSubscribe(SQLModel):
+    lat: float = Field(ge=-90, le=90)
+    lng: float = Field(ge=-180, le=180)
+    radius_km: float = Field(default=10.0, gt=0, le=50)
@@ -51,9 +51,28 @@ class UserPublic(UserBase):
     role: UserRole
     avt_url: str
 
+class UserPublicStored(UserPublic):
+    # Only for the prevalidated list responses (app/core/serialization.py), never a response_model:
+    # stored emails were validated when they were written, and re-running the email validator on
+    # every embedded owner/collector is most of a list's serialization time. Same JSON as UserPublic.
+    email: str
+
 class UsersPublic(SQLModel):
     data: list[UserPublic]
     count: int
 
 class CollectorPublic(UserPublic):
-    average_rating: float | None = None
\ No newline at end of file
+    average_rating: float | None = None
+    rating_count: int = 0
+    completed_orders: int = 0
+    total_quantity: float = 0
+
+class LeaderboardEntry(SQLModel):
+    rank: int
+    collector_id: uuid.UUID
+    full_name: str
+    avt_url: str | None = None
+    completed_orders: int
+    total_quantity: float
+    average_rating: float
+    rating_count: int
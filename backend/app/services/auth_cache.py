@@ -0,0 +1,55 @@
+import uuid
+from typing import Any, Dict
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import User
+from app.schemas.auth import AuthUser
+from app.services.broker import broker
+
+# get_current_user runs on every request and socket connect: keep the caller's id, role and token
+# version in process for AUTH_CACHE_TTL seconds instead of loading the user row each time.
+# Changes that matter for authorization (role, password, deletion) evict the entry on every worker
+# through INVALIDATION_CHANNEL; a missed eviction is still bounded by the TTL, and revoked tokens
+# fail the token version check as soon as the entry is reloaded.
+INVALIDATION_CHANNEL = "auth:invalidate"
+
+_auth_users = TTLCache(maxsize=settings.AUTH_CACHE_MAXSIZE, ttl=settings.AUTH_CACHE_TTL)
+
+
+def get(user_id: uuid.UUID) -> AuthUser | None:
+    return _auth_users.get(user_id)
+
+
+def remember(user: User) -> AuthUser:
+    auth_user = AuthUser(id=user.id, role=user.role, token_version=user.token_version)
+    _auth_users.set(user.id, auth_user)
+    return auth_user
+
+
+def invalidate(user_id: uuid.UUID) -> None:
+    _auth_users.pop(user_id)
+
+
+def clear() -> None:
+    _auth_users.clear()
+
+
+async def publish_invalidation(user_id: uuid.UUID) -> None:
+    """
+    Evict the user on every worker, this one included.
+    """
+    invalidate(user_id)
+    await broker.publish(INVALIDATION_CHANNEL, {"user_id": str(user_id)})
+
+
+async def _on_invalidation(message: Dict[str, Any]) -> None:
+    invalidate(uuid.UUID(message["user_id"]))
+
+
+async def start() -> None:
+    await broker.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+
+
+async def stop() -> None:
+    await broker.unsubscribe(INVALIDATION_CHANNEL, _on_invalidation)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class MessageBroker(ABC):
+    """
+    Channel-based publish/subscribe used to deliver real-time events (chat messages, ...)
+    to whichever worker holds the recipient's WebSocket.
+
+    Each worker subscribes only to the channels of its locally connected clients.
+    Messages are JSON-serializable dicts.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Set[Handler]] = defaultdict(set)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        ...
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers[channel].add(handler)
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.get(channel)
+        if handlers is None:
+            return
+        handlers.discard(handler)
+        if not handlers:
+            del self._handlers[channel]
+
+    async def _dispatch(self, channel: str, message: Dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(channel, ())):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.warning(f"Handler for channel {channel} failed: {e}")
+
+
+class LocalBroker(MessageBroker):
+    """
+    In-process broker: only reaches subscribers on the same worker. For single-process deployments and tests.
+    """
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        await self._dispatch(channel, message)
+
+
+class RedisBroker(MessageBroker):
+    """
+    Redis pub/sub broker: a message published on any worker reaches the subscribers on every worker.
+    """
+
+    def __init__(self, poll_timeout: float = 1.0):
+        super().__init__()
+        self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        self._poll_timeout = poll_timeout
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._pubsub.aclose()
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        try:
+            await redis_client.publish(channel, json.dumps(message))
+        except RedisError as e:
+            logger.warning(f"Publishing to {channel} failed: {e}")
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        is_new_channel = channel not in self._handlers
+        await super().subscribe(channel, handler)
+        if is_new_channel:
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        await super().unsubscribe(channel, handler)
+        if channel not in self._handlers:
+            await self._pubsub.unsubscribe(channel)
+
+    async def _listen(self) -> None:
+        while True:
+            # The pub/sub connection only exists once something is subscribed.
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(self._poll_timeout)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=self._poll_timeout)
+            except RedisError as e:
+                logger.warning(f"Redis pub/sub read failed: {e}")
+                await asyncio.sleep(self._poll_timeout)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            await self._dispatch(message["channel"], json.loads(message["data"]))
+
+
+def _create_broker() -> MessageBroker:
+    if settings.BROKER_BACKEND == "redis":
+        return RedisBroker()
+    return LocalBroker()
+
+
+broker = _create_broker()
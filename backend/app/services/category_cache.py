@@ -0,0 +1,73 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.serialization import dump_list
+from app.schemas.category import CategoryPublic
+from app.services.broker import broker
+
+# The category catalog rarely changes but is read on every app launch: keep its serialized JSON
+# and ETag in process. Admin edits publish on INVALIDATION_CHANNEL so every worker drops its copy;
+# a copy older than CATEGORY_CACHE_TTL is reloaded anyway, in case that message was lost (Redis
+# unavailable, a listener reconnecting, or the local broker with several workers).
+INVALIDATION_CHANNEL = "category:invalidate"
+
+_lock = threading.Lock()
+# (body, etag, loaded at), the load time on the monotonic clock.
+_catalog: Tuple[bytes, str, float] | None = None
+# Bumped on every invalidation, so that a catalog loaded before an edit is not cached after it.
+_version = 0
+
+
+def get_catalog(session: Session) -> Tuple[bytes, str]:
+    """
+    The serialized category list and its strong ETag, loaded from the database on a miss
+    or once the cached copy is older than CATEGORY_CACHE_TTL.
+    """
+    global _catalog
+    with _lock:
+        if _catalog is not None:
+            body, etag, loaded_at = _catalog
+            if time.monotonic() - loaded_at < settings.CATEGORY_CACHE_TTL:
+                return body, etag
+        version = _version
+
+    categories = crud.get_all_categories(session=session)
+    body = dump_list(CategoryPublic, categories)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    with _lock:
+        if version == _version:
+            _catalog = (body, etag, time.monotonic())
+    return body, etag
+
+
+def invalidate() -> None:
+    global _catalog, _version
+    with _lock:
+        _catalog = None
+        _version += 1
+
+
+async def publish_invalidation() -> None:
+    """
+    Drop the catalog on every worker, this one included.
+    """
+    invalidate()
+    await broker.publish(INVALIDATION_CHANNEL, {})
+
+
+async def _on_invalidation(message: Dict[str, Any]) -> None:
+    invalidate()
+
+
+async def start() -> None:
+    await broker.subscribe(INVALIDATION_CHANNEL, _on_invalidation)
+
+
+async def stop() -> None:
+    await broker.unsubscribe(INVALIDATION_CHANNEL, _on_invalidation)
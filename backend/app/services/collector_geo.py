@@ -0,0 +1,73 @@
+import logging
+import time
+import uuid
+from typing import List
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Live collector positions, mirrored from the tracking socket.
+# A GEO set answers radius searches; a companion sorted set (score = last ping time)
+# lets positions older than COLLECTOR_LOCATION_TTL be dropped, since GEO members have no TTL of their own.
+LIVE_KEY = "collectors:live"
+SEEN_KEY = "collectors:live:seen"
+
+
+async def record_position(collector_id: uuid.UUID, lat: float, lng: float) -> None:
+    member = str(collector_id)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.geoadd(LIVE_KEY, (lng, lat, member))
+            pipe.zadd(SEEN_KEY, {member: time.time()})
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Recording live position of collector {collector_id} failed: {e}")
+
+
+# Find and drop the stale members in one atomic step: a collector that pings between a separate
+# read and the removal would otherwise lose its fresh position. ZREM in chunks keeps unpack()
+# within Lua's stack limit.
+_EVICT_STALE = redis_client.register_script("""
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for i = 1, #stale, 1000 do
+    local chunk = {unpack(stale, i, math.min(i + 999, #stale))}
+    redis.call('ZREM', KEYS[1], unpack(chunk))
+    redis.call('ZREM', KEYS[2], unpack(chunk))
+end
+return #stale
+""")
+
+
+async def _evict_stale() -> None:
+    await _EVICT_STALE(keys=[LIVE_KEY, SEEN_KEY], args=[time.time() - settings.COLLECTOR_LOCATION_TTL])
+
+
+async def find_nearby(lat: float, lng: float, radius_km: float, limit: int) -> List[dict]:
+    """
+    Online collectors within radius_km of (lat, lng), nearest first.
+    Returns an empty list when Redis is unavailable.
+    """
+    try:
+        await _evict_stale()
+        results = await redis_client.geosearch(
+            LIVE_KEY,
+            longitude=lng,
+            latitude=lat,
+            radius=radius_km,
+            unit="km",
+            sort="ASC",
+            count=limit,
+            withdist=True,
+            withcoord=True,
+        )
+    except RedisError as e:
+        logger.warning(f"Nearby collector search failed: {e}")
+        return []
+    return [
+        {"collector_id": uuid.UUID(member), "distance_km": distance, "lat": coords[1], "lng": coords[0]}
+        for member, distance, coords in results
+    ]
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.redis import redis_client
+from app.services.mapbox_cache import quantize
+
+logger = logging.getLogger(__name__)
+
+# Only one worker refreshes per interval; the others find the lock taken and skip.
+REFRESH_LOCK_KEY = "leaderboard:refresh:lock"
+
+# Area grid in degrees. It is baked into the collector_leaderboard view (migration 1b7e3c5a9d42):
+# changing it needs a migration that recreates the view with the same value.
+AREA_CELL_SIZE = 0.1
+
+
+def area_for(lat: float, lng: float) -> str:
+    """
+    Leaderboard area of a position; must match the cell expression of the collector_leaderboard view.
+    """
+    return quantize(lng, lat, AREA_CELL_SIZE)
+
+
+async def refresh() -> bool:
+    """
+    Recompute the leaderboard without blocking readers. Returns False if another worker holds the lock.
+    """
+    try:
+        if not await redis_client.set(REFRESH_LOCK_KEY, "1", nx=True, ex=settings.LEADERBOARD_REFRESH_INTERVAL):
+            return False
+    except RedisError as e:
+        logger.warning(f"Leaderboard refresh lock unavailable, refreshing anyway: {e}")
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY collector_leaderboard"))
+    except SQLAlchemyError as e:
+        logger.warning(f"Leaderboard refresh failed: {e}")
+        return False
+    return True
+
+
+class LeaderboardRefresher:
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            await refresh()
+
+
+leaderboard_refresher = LeaderboardRefresher(interval=settings.LEADERBOARD_REFRESH_INTERVAL)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, Tuple
+
+from sqlalchemy import Double, Uuid, column, func, update, values
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LocationBuffer:
+    """
+    Write-behind buffer for collector GPS positions.
+
+    Only the latest (lng, lat) of each collector is kept; pending positions are written in a single
+    UPDATE ... FROM (VALUES ...) every LOCATION_FLUSH_INTERVAL seconds, as soon as
+    LOCATION_FLUSH_MAX_PENDING collectors are pending, and on shutdown.
+    User.current_location can therefore lag the live position by up to one interval.
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self._interval = interval
+        self._max_pending = max_pending
+        self._pending: Dict[uuid.UUID, Tuple[float, float]] = {}
+        self._flush_requested: asyncio.Event | None = None
+        self._flusher: asyncio.Task | None = None
+
+    def add(self, collector_id: uuid.UUID, lat: float, lng: float) -> None:
+        # One value the driver cannot bind fails the whole batched UPDATE, and every flush after it.
+        if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+            raise TypeError(f"Coordinates must be numbers, got lat={lat!r}, lng={lng!r}")
+        self._pending[collector_id] = (float(lng), float(lat))
+        if len(self._pending) >= self._max_pending and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    async def start(self) -> None:
+        if self._flusher is None:
+            # Created here, in the running loop: an Event binds to the loop it is first awaited in.
+            self._flush_requested = asyncio.Event()
+            self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write every pending position and return how many collectors were updated.
+        On failure the positions are put back, unless a newer one arrived in the meantime.
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+
+        rows = values(
+            column("id", Uuid),
+            column("lng", Double),
+            column("lat", Double),
+            name="new_location",
+        ).data([(collector_id, lng, lat) for collector_id, (lng, lat) in pending.items()])
+        statement = (
+            update(User)
+            .where(User.id == rows.c.id)
+            .values(current_location=func.ST_SetSRID(func.ST_MakePoint(rows.c.lng, rows.c.lat), 4326))
+        )
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(statement)
+        except Exception as e:
+            logger.warning(f"Flushing {len(pending)} collector locations failed: {e}")
+            self._pending = {**pending, **self._pending}
+            return 0
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Keep the flusher alive: a dead task would silently stop every later write.
+                logger.exception("Collector location flush failed")
+
+
+location_buffer = LocationBuffer(
+    interval=settings.LOCATION_FLUSH_INTERVAL,
+    max_pending=settings.LOCATION_FLUSH_MAX_PENDING,
+)
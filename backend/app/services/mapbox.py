@@ -1,7 +1,50 @@
+import uuid
 import httpx
 from app.core.config import settings
+from app.services import mapbox_cache
 from typing import List, Tuple, Dict, Optional
 
+# Client dùng chung cho toàn bộ app, được mở/đóng trong lifespan của FastAPI (app/main.py).
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.MAPBOX_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.MAPBOX_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MAPBOX_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.MAPBOX_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.MAPBOX_TIMEOUT, connect=settings.MAPBOX_CONNECT_TIMEOUT),
+    )
+
+
+async def start_client() -> None:
+    """
+    Open the shared, keep-alive pooled client used for every Mapbox call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared client, creating it on first use outside the app lifespan (scripts, tests).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
 async def get_travel_info_from_mapbox(
     origin: Tuple[float, float], # (lng, lat)
     destinations: List[Tuple[float, float]] # Danh sách (lng, lat)
@@ -25,26 +68,53 @@ async def get_travel_info_from_mapbox(
         "access_token": settings.MAPBOX_ACCESS_TOKEN
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(request_url, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get("code") == "Ok":
-                # Trả về một danh sách các dict {'duration': seconds, 'distance': meters}
-                results = []
-                for i in range(len(destinations)):
-                    results.append({
-                        "duration": data["durations"][0][i],
-                        "distance": data["distances"][0][i]
-                    })
-                return results
-            return None
-        except Exception as e:
-            print(f"Error calling Mapbox Matrix API: {e}")
-            return None
-        
+    client = get_client()
+    try:
+        response = await client.get(request_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("code") == "Ok":
+            # Trả về một danh sách các dict {'duration': seconds, 'distance': meters}
+            results = []
+            for i in range(len(destinations)):
+                results.append({
+                    "duration": data["durations"][0][i],
+                    "distance": data["distances"][0][i]
+                })
+            return results
+        return None
+    except Exception as e:
+        print(f"Error calling Mapbox Matrix API: {e}")
+        return None
+
+
+async def get_travel_info_for_orders(
+    origin: Tuple[float, float], # (lng, lat)
+    destinations: Dict[uuid.UUID, Tuple[float, float]], # order_id -> (lng, lat)
+    use_cache: bool = True,
+) -> Dict[uuid.UUID, Dict[str, float]]:
+    """
+    Travel duration and distance from origin to each order, keyed by order id.
+    Results are cached per order and quantized origin for TRAVEL_CACHE_TTL seconds;
+    only the orders missing from the cache are sent to the Matrix API.
+    """
+    if not destinations:
+        return {}
+    cell = mapbox_cache.quantize(origin[0], origin[1], settings.TRAVEL_CACHE_CELL_SIZE)
+    travel_info = await mapbox_cache.get_travel_info(cell, list(destinations)) if use_cache else {}
+
+    missing = [order_id for order_id in destinations if order_id not in travel_info]
+    if not missing:
+        return travel_info
+
+    results = await get_travel_info_from_mapbox(origin, [destinations[order_id] for order_id in missing])
+    if results:
+        fresh = dict(zip(missing, results))
+        await mapbox_cache.set_travel_info(cell, fresh)
+        travel_info.update(fresh)
+    return travel_info
+
 
 async def get_route_from_mapbox(start_lon: float, start_lat: float, end_lon: float, end_lat: float):
     """
@@ -69,34 +139,67 @@ async def get_route_from_mapbox(start_lon: float, start_lat: float, end_lon: flo
         "access_token": settings.MAPBOX_ACCESS_TOKEN
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(request_url, params=params, timeout=10.0)
-            response.raise_for_status() # Ném lỗi nếu status code là 4xx hoặc 5xx
-            
-            data = response.json()
-            if data.get("code") == "Ok" and data.get("routes"):
-                route = data["routes"][0]
-                return {
-                    "distance_meters": route.get("distance"),
-                    "duration_seconds": route.get("duration"),
-                    "polyline": route.get("geometry") # polyline đã được mã hóa
-                }
-            else:
-                print(f"Fail from Mapbox API: {data.get('message')}")
-                return None
-        except httpx.HTTPStatusError as e:
-            print(f"Fail HTTP khi gọi Mapbox: {e.response.text}")
-            return None
-        except Exception as e:
-            print(f"Undefined error when calling Mapbox: {e}")
+    client = get_client()
+    try:
+        response = await client.get(request_url, params=params)
+        response.raise_for_status() # Ném lỗi nếu status code là 4xx hoặc 5xx
+        
+        data = response.json()
+        if data.get("code") == "Ok" and data.get("routes"):
+            route = data["routes"][0]
+            return {
+                "distance_meters": route.get("distance"),
+                "duration_seconds": route.get("duration"),
+                "polyline": route.get("geometry") # polyline đã được mã hóa
+            }
+        else:
+            print(f"Fail from Mapbox API: {data.get('message')}")
             return None
+    except httpx.HTTPStatusError as e:
+        print(f"Fail HTTP khi gọi Mapbox: {e.response.text}")
+        return None
+    except Exception as e:
+        print(f"Undefined error when calling Mapbox: {e}")
+        return None
 
 
-async def geocode_address(address: str) -> Optional[Dict[str, float]]:
+async def get_order_route(
+    order_id: uuid.UUID, start_lon: float, start_lat: float, end_lon: float, end_lat: float, use_cache: bool = True
+):
+    """
+    Route from the start point to an order's pickup location, cached per order and
+    quantized start position for ROUTE_CACHE_TTL seconds.
+    """
+    cell = mapbox_cache.quantize(start_lon, start_lat, settings.ROUTE_CACHE_CELL_SIZE)
+    if use_cache:
+        cached = await mapbox_cache.get_route(order_id, cell)
+        if cached is not None:
+            return cached
+
+    route = await get_route_from_mapbox(start_lon, start_lat, end_lon, end_lat)
+    if route is not None:
+        await mapbox_cache.set_route(order_id, cell, route)
+    return route
+
+
+async def geocode_address(address: str, use_cache: bool = True) -> Optional[Dict[str, float]]:
     """
     USE MAPBOX GEOCODING API to convert address string to (lng, lat).
+    Results are cached by normalized address; pass use_cache=False to force a fresh lookup.
     """
+    use_cache = use_cache and settings.GEOCODE_CACHE_ENABLED
+    if use_cache:
+        cached = await mapbox_cache.get_geocode(address)
+        if cached is not None:
+            return cached
+
+    coords = await _geocode_address_from_mapbox(address)
+    if use_cache and coords is not None:
+        await mapbox_cache.set_geocode(address, coords)
+    return coords
+
+
+async def _geocode_address_from_mapbox(address: str) -> Optional[Dict[str, float]]:
     # Xây dựng URL. Mapbox yêu cầu địa chỉ phải được URL-encoded.
     # httpx sẽ tự động làm việc này khi truyền qua `params`.
     request_url = f"https://api.mapbox.com/geocoding/v5/mapbox.places/{address}.json"
@@ -106,29 +209,29 @@ async def geocode_address(address: str) -> Optional[Dict[str, float]]:
         "limit": 1 # Chỉ lấy kết quả phù hợp nhất
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(request_url, params=params, timeout=10.0)
-            response.raise_for_status() # Ném lỗi nếu status code là 4xx hoặc 5xx
-            
-            data = response.json()
-            
-            # Kiểm tra xem có kết quả không
-            if data.get("features"):
-                first_result = data["features"][0]
-                coordinates = first_result.get("geometry", {}).get("coordinates")
-                
-                if coordinates and len(coordinates) == 2:
-                    # Mapbox trả về [longitude, latitude]
-                    lng, lat = coordinates
-                    return {"lng": lng, "lat": lat}
-            
-            # Trả về None nếu không tìm thấy
-            return None
+    client = get_client()
+    try:
+        response = await client.get(request_url, params=params)
+        response.raise_for_status() # Ném lỗi nếu status code là 4xx hoặc 5xx
+        
+        data = response.json()
+        
+        # Kiểm tra xem có kết quả không
+        if data.get("features"):
+            first_result = data["features"][0]
+            coordinates = first_result.get("geometry", {}).get("coordinates")
             
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error from request Mapbox Geocoding: {e.response.text}")
-            return None
-        except Exception as e:
-            print(f"undefined error: {e}")
-            return None
\ No newline at end of file
+            if coordinates and len(coordinates) == 2:
+                # Mapbox trả về [longitude, latitude]
+                lng, lat = coordinates
+                return {"lng": lng, "lat": lat}
+        
+        # Trả về None nếu không tìm thấy
+        return None
+        
+    except httpx.HTTPStatusError as e:
+        print(f"HTTP error from request Mapbox Geocoding: {e.response.text}")
+        return None
+    except Exception as e:
+        print(f"undefined error: {e}")
+        return None
\ No newline at end of file
@@ -0,0 +1,187 @@
+import json
+import logging
+import math
+import re
+import time
+import unicodedata
+import uuid
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# ============================== Geocoding cache ==============================
+
+_geocode_local = TTLCache(maxsize=settings.GEOCODE_CACHE_LOCAL_SIZE, ttl=settings.GEOCODE_CACHE_LOCAL_TTL)
+_geocode_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0}
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonicalize an address so that spelling variants share one cache key:
+    "  123 Lê Lợi,Quận 1 " and "123 le loi, quan 1" both become "123 le loi, quan 1".
+    """
+    # "đ" is a separate letter, not "d" plus a combining mark, so NFKD does not strip it.
+    text = address.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold()
+    text = re.sub(r"\s*,\s*", ", ", text)
+    return " ".join(text.split())
+
+
+def _geocode_key(normalized_address: str) -> str:
+    return f"mapbox:geocode:{normalized_address}"
+
+
+def _record_geocode_lookup(outcome: str) -> None:
+    _geocode_stats[outcome] += 1
+    every = settings.GEOCODE_CACHE_STATS_LOG_EVERY
+    if every and sum(_geocode_stats.values()) % every == 0:
+        logger.info(f"Geocode cache: {geocode_cache_stats()}")
+
+
+async def get_geocode(address: str) -> Optional[Dict[str, float]]:
+    """
+    Look the address up in the in-process tier first, then in Redis.
+    A Redis hit is copied back into the in-process tier.
+    """
+    key = normalize_address(address)
+    coords = _geocode_local.get(key)
+    if coords is not None:
+        _record_geocode_lookup("local_hits")
+        return coords
+
+    try:
+        cached = await redis_client.get(_geocode_key(key))
+    except RedisError as e:
+        logger.warning(f"Geocode cache read failed: {e}")
+        cached = None
+    if cached is not None:
+        coords = json.loads(cached)
+        _geocode_local.set(key, coords)
+        _record_geocode_lookup("redis_hits")
+        return coords
+
+    _record_geocode_lookup("misses")
+    return None
+
+
+async def set_geocode(address: str, coords: Dict[str, float]) -> None:
+    key = normalize_address(address)
+    _geocode_local.set(key, coords)
+    try:
+        await redis_client.set(_geocode_key(key), json.dumps(coords), ex=settings.GEOCODE_CACHE_REDIS_TTL)
+    except RedisError as e:
+        logger.warning(f"Geocode cache write failed: {e}")
+
+
+def geocode_cache_stats() -> Dict[str, int]:
+    """
+    Lookups served by each tier since the worker started, logged every GEOCODE_CACHE_STATS_LOG_EVERY lookups.
+    """
+    return {**_geocode_stats, "local_size": len(_geocode_local)}
+
+
+# ============================== Travel-time (matrix) cache ==============================
+# One Redis hash per destination order: field = origin grid cell, value = travel info + timestamp.
+# Keeping all cells of an order under one key lets invalidate_travel_info drop them in one DEL.
+
+def quantize(lng: float, lat: float, cell_size: float) -> str:
+    """
+    Snap a (lng, lat) pair to the grid cell that contains it.
+    """
+    return f"{math.floor(lng / cell_size)}:{math.floor(lat / cell_size)}"
+
+
+def _travel_key(order_id: uuid.UUID) -> str:
+    return f"mapbox:matrix:{order_id}"
+
+
+async def get_travel_info(cell: str, order_ids: List[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, float]]:
+    """
+    Return the cached travel info from `cell` for every order that still has a fresh entry.
+    """
+    if not order_ids:
+        return {}
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for order_id in order_ids:
+                pipe.hget(_travel_key(order_id), cell)
+            raw_values = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Travel cache read failed: {e}")
+        return {}
+
+    now = time.time()
+    found = {}
+    for order_id, raw in zip(order_ids, raw_values):
+        if raw is None:
+            continue
+        entry = json.loads(raw)
+        if now - entry["ts"] < settings.TRAVEL_CACHE_TTL:
+            found[order_id] = {"duration": entry["duration"], "distance": entry["distance"]}
+    return found
+
+
+async def set_travel_info(cell: str, travel_info: Dict[uuid.UUID, Dict[str, float]]) -> None:
+    if not travel_info:
+        return
+    now = time.time()
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for order_id, info in travel_info.items():
+                key = _travel_key(order_id)
+                pipe.hset(key, cell, json.dumps({**info, "ts": now}))
+                pipe.expire(key, settings.TRAVEL_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Travel cache write failed: {e}")
+
+
+async def invalidate_travel_info(order_id: uuid.UUID) -> None:
+    """
+    Drop every cached travel time to an order, e.g. once it is no longer PENDING.
+    """
+    try:
+        await redis_client.delete(_travel_key(order_id))
+    except RedisError as e:
+        logger.warning(f"Travel cache invalidation failed: {e}")
+
+
+# ============================== Route cache ==============================
+# Same layout as the travel cache: one hash per order, one field per quantized start cell.
+
+def _route_key(order_id: uuid.UUID) -> str:
+    return f"mapbox:route:{order_id}"
+
+
+async def get_route(order_id: uuid.UUID, cell: str) -> Optional[Dict]:
+    try:
+        raw = await redis_client.hget(_route_key(order_id), cell)
+    except RedisError as e:
+        logger.warning(f"Route cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+    entry = json.loads(raw)
+    if time.time() - entry.pop("ts") >= settings.ROUTE_CACHE_TTL:
+        return None
+    return entry
+
+
+async def set_route(order_id: uuid.UUID, cell: str, route: Dict) -> None:
+    key = _route_key(order_id)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, cell, json.dumps({**route, "ts": time.time()}))
+            pipe.expire(key, settings.ROUTE_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Route cache write failed: {e}")
@@ -0,0 +1,73 @@
+import logging
+import uuid
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Broadcast fan-out jobs. Progress is kept in a Redis hash so that any worker can report it,
+# whichever worker runs the job.
+JOB_TTL = 60 * 60 * 24
+
+
+def _job_key(job_id: uuid.UUID) -> str:
+    return f"jobs:notification:{job_id}"
+
+
+async def _update_job(job_id: uuid.UUID, **fields: Any) -> None:
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(_job_key(job_id), mapping={k: str(v) for k, v in fields.items()})
+            pipe.expire(_job_key(job_id), JOB_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Updating notification job {job_id} failed: {e}")
+
+
+async def create_job(notification_id: uuid.UUID, status: str = "pending") -> Dict[str, Any]:
+    job = {"id": uuid.uuid4(), "notification_id": notification_id, "status": status, "total": 0, "done": 0}
+    await _update_job(job["id"], **{k: v for k, v in job.items() if k != "id"})
+    return job
+
+
+async def get_job(job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    try:
+        job = await redis_client.hgetall(_job_key(job_id))
+    except RedisError as e:
+        logger.warning(f"Reading notification job {job_id} failed: {e}")
+        return None
+    if not job:
+        return None
+    return {**job, "id": job_id}
+
+
+async def run_fan_out(job_id: uuid.UUID, notification_id: uuid.UUID) -> None:
+    """
+    Add every user as a recipient of the notification, NOTIFICATION_FANOUT_CHUNK_SIZE users per
+    INSERT ... SELECT, committing and reporting progress after each chunk.
+    Chunks are idempotent (ON CONFLICT DO NOTHING), so a failed job can simply be run again.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        try:
+            total = await crud.count_users_async(session)
+            await _update_job(job_id, status="running", total=total)
+            done, after_user_id = 0, None
+            while True:
+                inserted, after_user_id = await crud.add_notification_recipients_chunk(
+                    session, notification_id, after_user_id, settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+                )
+                done += inserted
+                await _update_job(job_id, done=done)
+                if after_user_id is None:
+                    break
+            await _update_job(job_id, status="completed")
+        except Exception as e:
+            logger.error(f"Notification fan-out job {job_id} failed: {e}")
+            await _update_job(job_id, status="failed")
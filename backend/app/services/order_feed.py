@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import math
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from app.core.config import settings
+from app.models import Order
+from app.schemas.order import OrderPublic
+from app.services.broker import broker
+
+logger = logging.getLogger(__name__)
+
+FEED_CHANNEL = "orders:feed"
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """
+    In-memory spatial index of circular areas (lat, lng, radius_km).
+    Each area is registered in every grid cell its bounding box touches, so a point lookup only
+    checks the areas of one cell before the exact distance test.
+    """
+
+    def __init__(self, cell_size: float):
+        self._cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[uuid.UUID]] = defaultdict(set)
+        self._areas: Dict[uuid.UUID, Tuple[float, float, float, list]] = {}
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lng / self._cell_size), math.floor(lat / self._cell_size)
+
+    def add(self, key: uuid.UUID, lat: float, lng: float, radius_km: float) -> None:
+        self.remove(key)
+        dlat = radius_km / 111.32
+        dlng = radius_km / (111.32 * max(math.cos(math.radians(lat)), 0.01))
+        min_x, min_y = self._cell(lat - dlat, lng - dlng)
+        max_x, max_y = self._cell(lat + dlat, lng + dlng)
+        cells = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+        for cell in cells:
+            self._cells[cell].add(key)
+        self._areas[key] = (lat, lng, radius_km, cells)
+
+    def remove(self, key: uuid.UUID) -> None:
+        area = self._areas.pop(key, None)
+        if area is None:
+            return
+        for cell in area[3]:
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def query(self, lat: float, lng: float) -> Dict[uuid.UUID, float]:
+        """
+        Keys of the areas that contain the point, with the distance from each area's center in km.
+        """
+        matches = {}
+        for key in self._cells.get(self._cell(lat, lng), ()):
+            area_lat, area_lng, radius_km, _ = self._areas[key]
+            distance = haversine_km(area_lat, area_lng, lat, lng)
+            if distance <= radius_km:
+                matches[key] = distance
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._areas)
+
+
+class OrderFeed:
+    """
+    Pushes new PENDING orders to the collectors whose subscribed area covers them, and retracts
+    them once accepted. Events go through the broker so that every worker matches them against
+    the subscriptions of its own sockets.
+    """
+
+    def __init__(self, cell_size: float):
+        self._index = GridIndex(cell_size)
+        self._senders: Dict[uuid.UUID, Send] = {}
+
+    async def start(self) -> None:
+        await broker.subscribe(FEED_CHANNEL, self._on_event)
+
+    async def stop(self) -> None:
+        await broker.unsubscribe(FEED_CHANNEL, self._on_event)
+
+    def subscribe(self, key: uuid.UUID, lat: float, lng: float, radius_km: float, send: Send) -> None:
+        self._index.add(key, lat, lng, radius_km)
+        self._senders[key] = send
+
+    def unsubscribe(self, key: uuid.UUID) -> None:
+        self._index.remove(key)
+        self._senders.pop(key, None)
+
+    async def publish_created(self, order: Order) -> None:
+        data = OrderPublic.model_validate(order).model_dump(mode="json")
+        lng, lat = data["location"]["coordinates"]
+        await broker.publish(FEED_CHANNEL, {"type": "order_created", "lat": lat, "lng": lng, "data": data})
+
+    async def publish_retracted(self, order_id: uuid.UUID, lat: float, lng: float) -> None:
+        await broker.publish(
+            FEED_CHANNEL, {"type": "order_retracted", "lat": lat, "lng": lng, "data": {"id": str(order_id)}}
+        )
+
+    async def _on_event(self, event: Dict[str, Any]) -> None:
+        matches = self._index.query(event["lat"], event["lng"])
+        if not matches:
+            return
+        sends = []
+        for key, distance in matches.items():
+            send = self._senders.get(key)
+            if send:
+                sends.append(send({"type": event["type"], "data": {**event["data"], "distance_km": distance}}))
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            logger.warning(f"Order feed: {failed} of {len(results)} pushes failed")
+
+
+order_feed = OrderFeed(cell_size=settings.ORDER_FEED_CELL_SIZE)
@@ -1,8 +1,44 @@
+from types import SimpleNamespace
+
 from fastapi.testclient import TestClient
 
 from app.models import User
 from app.core.config import settings
 from app.models import ScrapCategory
+from app.api.endpoints.category import etag_matches
+from app.services import category_cache
+
+class TestEtagMatches:
+    def test_compares_each_tag_exactly(self) -> None:
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('"x", "abc"', '"abc"')
+        assert not etag_matches('"abcd"', '"abc"')
+        assert not etag_matches('"xabc", "abcx"', '"abc"')
+        assert not etag_matches('', '"abc"')
+
+    def test_weak_tags_and_wildcard(self) -> None:
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x",W/"abc"', '"abc"')
+        assert etag_matches('*', '"abc"')
+
+class TestCategoryCache:
+    def test_catalog_reloads_after_ttl(self, monkeypatch) -> None:
+        loads = []
+        monkeypatch.setattr(category_cache.crud, "get_all_categories", lambda session: loads.append(session) or [])
+        now = [1000.0]
+        monkeypatch.setattr(category_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+        category_cache.invalidate()
+
+        first = category_cache.get_catalog(None)
+        now[0] += settings.CATEGORY_CACHE_TTL - 1
+        assert category_cache.get_catalog(None) == first
+        assert len(loads) == 1
+
+        # A lost invalidation only lasts until the copy expires.
+        now[0] += 1
+        assert category_cache.get_catalog(None) == first
+        assert len(loads) == 2
+        category_cache.invalidate()
 
 class TestCategoryEndpoints:
     def test_get_categories(self, client: TestClient, test_scrap_category: list[ScrapCategory]) -> None:
@@ -11,6 +47,27 @@ class TestCategoryEndpoints:
         assert isinstance(response.json(), list)
         assert len(response.json()) == len(test_scrap_category)
 
+    def test_get_categories_etag(self, authenticated_client: TestClient, test_scrap_category: list[ScrapCategory]) -> None:
+        response = authenticated_client.get(f"{settings.API_STR}/category/")
+        etag = response.headers["ETag"]
+
+        response = authenticated_client.get(f"{settings.API_STR}/category/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        category_data = {
+            "name": "Another Category",
+            "slug": "another-category",
+            "description": "Added after the catalog was cached",
+            "unit": "kg",
+            "estimated_price_per_unit": 10.0
+        }
+        authenticated_client.post(f"{settings.API_STR}/category/", json=category_data)
+
+        response = authenticated_client.get(f"{settings.API_STR}/category/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == len(test_scrap_category) + 1
+
     def test_create_category(self, authenticated_client: TestClient, test_user: User) -> None:
         category_data = {
             "name": "Test Category",
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.models import Message, User
+from app.schemas.chat import ConversationCreate
+
+
+def create_conversation_with_messages(session: Session, sender: User, other: User, count: int):
+    conversation = crud.create_conversation(
+        session=session, conversation_create=ConversationCreate(member_ids=[other.id]), user_id=sender.id
+    )
+    now = datetime.now()
+    messages = [
+        Message(conversation_id=conversation.id, sender_id=sender.id, content=f"Message {i}", created_at=now - timedelta(minutes=count - i))
+        for i in range(count)
+    ]
+    session.add_all(messages)
+    session.commit()
+    return conversation, messages
+
+
+class TestChatEndpoints:
+    def test_get_messages_pages_backward(self, authenticated_client: TestClient, session: Session, test_user: User, another_test_user: User):
+        conversation, messages = create_conversation_with_messages(session, test_user, another_test_user, 5)
+        url = f"{settings.API_STR}/chat/conversations/{conversation.id}/messages/"
+
+        # Newest page first, each page in chronological order; X-Before-Cursor walks back in time.
+        pages, params = [], {"limit": 2}
+        while True:
+            response = authenticated_client.get(url, params=params)
+            assert response.status_code == 200
+            pages.append([m["id"] for m in response.json()])
+            before = response.headers.get("X-Before-Cursor")
+            if not before:
+                break
+            params = {"limit": 2, "before": before}
+
+        ids = [str(m.id) for m in messages]
+        assert pages == [ids[3:5], ids[1:3], ids[0:1]]
+
+    def test_get_messages_pages_forward(self, authenticated_client: TestClient, session: Session, test_user: User, another_test_user: User):
+        conversation, messages = create_conversation_with_messages(session, test_user, another_test_user, 5)
+        url = f"{settings.API_STR}/chat/conversations/{conversation.id}/messages/"
+
+        # Everything newer than the first message, oldest first; X-After-Cursor walks forward.
+        pages, after = [], encode_cursor(messages[0].created_at, messages[0].id)
+        while after:
+            response = authenticated_client.get(url, params={"limit": 2, "after": after})
+            assert response.status_code == 200
+            pages.append([m["id"] for m in response.json()])
+            after = response.headers.get("X-After-Cursor")
+
+        ids = [str(m.id) for m in messages]
+        assert pages == [ids[1:3], ids[3:5]]
+
+    def test_get_messages_before_and_after(self, authenticated_client: TestClient, session: Session, test_user: User, another_test_user: User):
+        conversation, messages = create_conversation_with_messages(session, test_user, another_test_user, 1)
+        cursor = encode_cursor(messages[0].created_at, messages[0].id)
+        response = authenticated_client.get(
+            f"{settings.API_STR}/chat/conversations/{conversation.id}/messages/", params={"before": cursor, "after": cursor}
+        )
+        assert response.status_code == 400
+
+    def test_get_conversations_paginated(self, authenticated_client: TestClient, session: Session, test_user: User, another_test_user: User):
+        conversations = [
+            crud.create_conversation(session=session, conversation_create=ConversationCreate(member_ids=[another_test_user.id]), user_id=test_user.id)
+            for _ in range(3)
+        ]
+        url = f"{settings.API_STR}/chat/conversations/"
+
+        first = authenticated_client.get(url, params={"limit": 2})
+        assert first.status_code == 200
+        assert len(first.json()) == 2
+        next_cursor = first.headers["X-Next-Cursor"]
+
+        second = authenticated_client.get(url, params={"limit": 2, "cursor": next_cursor})
+        assert second.status_code == 200
+        assert len(second.json()) == 1
+        assert "X-Next-Cursor" not in second.headers
+
+        ids = [c["id"] for c in first.json() + second.json()]
+        assert sorted(ids) == sorted(str(c.id) for c in conversations)
+
+    def test_conversation_unread_count_and_read(self, authenticated_client: TestClient, session: Session, test_user: User, another_test_user: User):
+        from app.schemas.chat import MessageCreate
+
+        conversation = crud.create_conversation(
+            session=session, conversation_create=ConversationCreate(member_ids=[test_user.id]), user_id=another_test_user.id
+        )
+        for i in range(2):
+            crud.create_message(session=session, message_create=MessageCreate(conversation_id=conversation.id, content=f"Hi {i}"), sender_id=another_test_user.id)
+        url = f"{settings.API_STR}/chat/conversations/"
+
+        response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert [(c["id"], c["unread_count"]) for c in response.json()] == [(str(conversation.id), 2)]
+
+        response = authenticated_client.post(f"{settings.API_STR}/chat/conversations/{conversation.id}/read")
+        assert response.status_code == 200
+        assert response.json()["unread_count"] == 0
+
+        response = authenticated_client.get(url)
+        assert response.json()[0]["unread_count"] == 0
+
+    def test_websocket_invalid_read_frame_keeps_socket_open(self, client: TestClient, test_user: User, test_user_token: str):
+        with client.websocket_connect(f"{settings.API_STR}/chat/ws/chat", headers={"Authorization": f"Bearer {test_user_token}"}) as websocket:
+            websocket.send_json({"type": "read", "data": {}})
+            assert websocket.receive_json() == {"error": "Invalid conversation_id"}
+            websocket.send_json({"type": "read", "data": {"conversation_id": "not-a-uuid"}})
+            assert websocket.receive_json() == {"error": "Invalid conversation_id"}
+            websocket.send_json({"type": "read"})
+            assert websocket.receive_json() == {"error": "Invalid conversation_id"}
+            # Still open
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"error": "Unknown message type"}
@@ -0,0 +1,141 @@
+import importlib.util
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from geoalchemy2.shape import from_shape
+from redis.exceptions import RedisError
+from shapely.geometry import Point
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models import Order, OrderItem, OrderStatus, ScrapCategory, Transaction, TransactionMethod, TransactionStatus, User, UserRole
+from app.services import leaderboard
+from tests.conftest import async_engine
+
+
+def load_migration():
+    # Migration modules are not importable by name (alembic/versions is not a package).
+    path = next((Path(__file__).parents[3] / "alembic" / "versions").glob("1b7e3c5a9d42_*.py"))
+    spec = importlib.util.spec_from_file_location("leaderboard_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestAreaFor:
+    def test_matches_the_view_cell_expression(self):
+        # The view computes floor(ST_X / 0.1) || ':' || floor(ST_Y / 0.1) in float8, as Python does.
+        view = load_migration().LEADERBOARD_VIEW
+        assert f"floor(ST_X(o.location) / {leaderboard.AREA_CELL_SIZE})" in view
+        assert f"floor(ST_Y(o.location) / {leaderboard.AREA_CELL_SIZE})" in view
+        assert leaderboard.area_for(10.8, 106.7) == "1067:108"
+
+    def test_boundaries(self):
+        assert leaderboard.area_for(10.0, 106.3) == "1063:100"
+        # 0.3 / 0.1 is 2.9999999999999996 in float8 too: the cell is 2, not 3.
+        assert leaderboard.area_for(0.3, 106.0) == "1060:2"
+
+    def test_negative_coordinates(self):
+        # floor, not truncation: just west/south of 0 is cell -1.
+        assert leaderboard.area_for(-0.05, -0.05) == "-1:-1"
+        assert leaderboard.area_for(-33.87, 151.21) == "1512:-339"
+        assert leaderboard.area_for(-0.1, -180.0) == "-1800:-1"
+
+
+@pytest.fixture
+def leaderboard_view(session: Session) -> Generator[None, None, None]:
+    # create_all does not know the materialized view: build it as the migration does.
+    session.execute(text(load_migration().LEADERBOARD_VIEW))
+    session.execute(text("CREATE UNIQUE INDEX ux_collector_leaderboard ON collector_leaderboard (time_window, area, collector_id)"))
+    session.commit()
+    yield
+    session.rollback()
+    session.execute(text("DROP MATERIALIZED VIEW IF EXISTS collector_leaderboard"))
+    session.commit()
+
+
+def create_collector(session: Session, index: int) -> User:
+    collector = User(
+        full_name=f"Collector {index}",
+        phone_number=f"094000000{index}",
+        email=f"collector{index}@example.com",
+        hashed_password=f"hash-{index}",
+        avt_url=settings.DEFAULT_AVATAR_URL,
+        role=UserRole.COLLECTOR,
+    )
+    session.add(collector)
+    session.commit()
+    session.refresh(collector)
+    return collector
+
+
+def complete_orders(session: Session, owner: User, collector: User, category: ScrapCategory, count: int) -> None:
+    for _ in range(count):
+        order = Order(
+            owner_id=owner.id,
+            collector_id=collector.id,
+            pickup_address="227 Nguyễn Văn Cừ, Quận 5",
+            location=from_shape(Point(106.7, 10.8), srid=4326),
+            status=OrderStatus.COMPLETED,
+        )
+        session.add(order)
+        session.commit()
+        session.add(OrderItem(order_id=order.id, category_id=category.id, quantity=2.0))
+        session.add(Transaction(
+            order_id=order.id,
+            payer_id=collector.id,
+            payee_id=owner.id,
+            amount=20.0,
+            method=TransactionMethod.CASH,
+            status=TransactionStatus.SUCCESSFUL,
+        ))
+        session.commit()
+
+
+class TestLeaderboardEndpoint:
+    def test_ranks_and_pages(
+        self,
+        client: TestClient,
+        session: Session,
+        leaderboard_view: None,
+        test_user: User,
+        test_scrap_category: list[ScrapCategory],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        collectors = [create_collector(session, i) for i in range(3)]
+        for collector, count in zip(collectors, (2, 3, 1)):
+            complete_orders(session, test_user, collector, test_scrap_category[0], count)
+
+        # refresh() writes through the app's engine: point it at the test database, and drop a
+        # lock a previous run may have left behind.
+        monkeypatch.setattr(leaderboard, "async_engine", async_engine)
+        try:
+            client.portal.call(redis_client.delete, leaderboard.REFRESH_LOCK_KEY)
+        except RedisError:
+            pass
+        assert client.portal.call(leaderboard.refresh)
+
+        url = f"{settings.API_STR}/user/collectors/leaderboard"
+        first = client.get(url, params={"window": "all", "sort_by": "orders", "limit": 2})
+        assert first.status_code == 200
+        assert [(e["rank"], e["collector_id"], e["completed_orders"]) for e in first.json()] == [
+            (1, str(collectors[1].id), 3),
+            (2, str(collectors[0].id), 2),
+        ]
+        assert first.json()[0]["total_quantity"] == 6.0
+        assert first.headers["X-Next-Cursor"] == "2"
+
+        second = client.get(url, params={"window": "all", "sort_by": "orders", "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+        assert second.status_code == 200
+        assert [(e["rank"], e["collector_id"]) for e in second.json()] == [(3, str(collectors[2].id))]
+        assert "X-Next-Cursor" not in second.headers
+
+        # The area around the pickups has the same collectors; an area elsewhere has none.
+        nearby = client.get(url, params={"window": "7d", "lat": 10.85, "lng": 106.75})
+        assert [e["collector_id"] for e in nearby.json()] == [str(c.id) for c in (collectors[1], collectors[0], collectors[2])]
+        elsewhere = client.get(url, params={"window": "7d", "lat": 21.0, "lng": 105.8})
+        assert elsewhere.json() == []
@@ -22,3 +22,24 @@ class TestOrderEndpoints:
         assert data["location"]["type"] == "Point"
         assert data["location"]["coordinates"] == [98.765432, 12.345678]
 
+
+    def test_get_orders_paginated(self, authenticated_client: TestClient, session: Session, test_user: User) -> None:
+        from datetime import datetime, timedelta
+        from app.models import OrderStatus
+        now = datetime.now()
+        orders = [
+            Order(owner_id=test_user.id, pickup_address=f"{i} Test St", status=OrderStatus.PENDING, created_at=now - timedelta(minutes=i))
+            for i in range(3)
+        ]
+        session.add_all(orders)
+        session.commit()
+
+        first = authenticated_client.get(f"{settings.API_STR}/orders/", params={"limit": 2})
+        assert first.status_code == 200
+        assert [o["id"] for o in first.json()] == [str(orders[0].id), str(orders[1].id)]
+        next_cursor = first.headers["X-Next-Cursor"]
+
+        second = authenticated_client.get(f"{settings.API_STR}/orders/", params={"limit": 2, "cursor": next_cursor})
+        assert second.status_code == 200
+        assert [o["id"] for o in second.json()] == [str(orders[2].id)]
+        assert "X-Next-Cursor" not in second.headers
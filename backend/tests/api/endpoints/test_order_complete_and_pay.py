@@ -104,6 +104,47 @@ class TestOrderCompleteAndPay:
         assert data["status"] in ("successful", "pending")
         assert "payer" in data and "payee" in data
 
+    def test_complete_order_updates_collector_stats(self, collector_client, session: Session, collector_user, test_user):
+        from app.models import CollectorStats
+        category = ScrapCategory(
+            name="Test Category",
+            slug="test-category",
+            unit="kg",
+            estimated_price_per_unit=10000,
+            created_by=test_user.id,
+            last_updated_by=test_user.id
+        )
+        session.add(category)
+        session.commit()
+        session.refresh(category)
+        order = Order(
+            owner_id=test_user.id,
+            collector_id=collector_user.id,
+            pickup_address="123 Test St",
+            location=from_shape(Point(106.0, 10.0), srid=4326),
+            status=OrderStatus.ACCEPTED
+        )
+        session.add(order)
+        session.commit()
+        session.refresh(order)
+        order_item = OrderItem(order_id=order.id, category_id=category.id, quantity=2.0)
+        session.add(order_item)
+        session.commit()
+        session.refresh(order_item)
+
+        payload = {
+            "payment_method": TransactionMethod.CASH,
+            "items": [{"order_item_id": str(order_item.id), "actual_quantity": 3.5}]
+        }
+        response = collector_client.post(f"{settings.API_STR}/orders/{order.id}/complete", json=payload)
+
+        assert response.status_code == 201
+        stats = session.get(CollectorStats, collector_user.id)
+        session.refresh(stats)
+        assert stats.completed_orders == 1
+        assert stats.total_quantity == 3.5
+        assert stats.rating_count == 0
+
     def test_complete_order_and_pay_unauthorized(self, client: TestClient, session: Session, test_user, collector_user):
         # Create referenced ScrapCategory with required fields
         category = ScrapCategory(
@@ -233,3 +274,101 @@ class TestOrderAccept:
 
         resp = collector_client.post(f"{settings.API_STR}/orders/{order.id}/accept", json={"note": None})
         assert resp.status_code in (400, 409)
+
+
+@pytest.fixture
+def rated_collector(session: Session):
+    from app.models import User
+    # CollectorPublic validates the email, so this collector needs a real one.
+    user = User(
+        full_name="Rated Collector",
+        phone_number="0977777777",
+        email="rated.collector@example.com",
+        hashed_password="$2b$12$testhashforratedcollector",
+        avt_url=settings.DEFAULT_AVATAR_URL,
+        role=UserRole.COLLECTOR
+    )
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def create_order_with_items(session: Session, owner_id, collector_id, category_id, quantities, status=OrderStatus.COMPLETED) -> Order:
+    order = Order(
+        owner_id=owner_id,
+        collector_id=collector_id,
+        pickup_address="123 Test St",
+        location=from_shape(Point(106.0, 10.0), srid=4326),
+        status=status
+    )
+    session.add(order)
+    session.commit()
+    session.refresh(order)
+    for quantity in quantities:
+        session.add(OrderItem(order_id=order.id, category_id=category_id, quantity=quantity))
+    session.commit()
+    return order
+
+
+class TestCollectorStats:
+    def test_review_updates_collector_stats(self, authenticated_client: TestClient, session: Session, test_user, rated_collector, test_scrap_category):
+        from app.models import CollectorStats
+        orders = [
+            create_order_with_items(session, test_user.id, rated_collector.id, test_scrap_category[0].id, [1.0])
+            for _ in range(2)
+        ]
+
+        for order, rating in zip(orders, (5, 3)):
+            response = authenticated_client.post(f"{settings.API_STR}/orders/{order.id}/review", json={"rating": rating})
+            assert response.status_code == 200, response.text
+
+        stats = session.get(CollectorStats, rated_collector.id)
+        session.refresh(stats)
+        assert stats.rating_sum == 8
+        assert stats.rating_count == 2
+
+    def test_get_order_collector_with_stats(self, authenticated_client: TestClient, session: Session, test_user, rated_collector, test_scrap_category):
+        from app.models import CollectorStats
+        order = create_order_with_items(session, test_user.id, rated_collector.id, test_scrap_category[0].id, [1.0])
+        session.add(CollectorStats(collector_id=rated_collector.id, rating_sum=9, rating_count=2, completed_orders=3, total_quantity=7.5))
+        session.commit()
+
+        response = authenticated_client.get(f"{settings.API_STR}/orders/{order.id}/collector")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["id"] == str(rated_collector.id)
+        assert data["average_rating"] == 4.5
+        assert data["rating_count"] == 2
+        assert data["completed_orders"] == 3
+        assert data["total_quantity"] == 7.5
+
+    def test_get_order_collector_without_stats(self, authenticated_client: TestClient, session: Session, test_user, rated_collector, test_scrap_category):
+        order = create_order_with_items(session, test_user.id, rated_collector.id, test_scrap_category[0].id, [1.0], status=OrderStatus.ACCEPTED)
+
+        response = authenticated_client.get(f"{settings.API_STR}/orders/{order.id}/collector")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["average_rating"] is None
+        assert data["rating_count"] == 0
+        assert data["completed_orders"] == 0
+        assert data["total_quantity"] == 0
+
+    def test_rebuild_collector_stats(self, session: Session, test_user, rated_collector, test_scrap_category):
+        from app import crud
+        from app.models import CollectorStats, Review
+        category_id = test_scrap_category[0].id
+        rated = create_order_with_items(session, test_user.id, rated_collector.id, category_id, [2.0, 1.5])
+        create_order_with_items(session, test_user.id, rated_collector.id, category_id, [4.0])
+        # Not completed: counts for nothing
+        create_order_with_items(session, test_user.id, rated_collector.id, category_id, [100.0], status=OrderStatus.ACCEPTED)
+        session.add(Review(user_id=test_user.id, order_id=rated.id, rating=4))
+        # Drifted counters are replaced, not added to
+        session.add(CollectorStats(collector_id=rated_collector.id, rating_sum=50, rating_count=10, completed_orders=99, total_quantity=1.0))
+        session.commit()
+
+        assert crud.rebuild_collector_stats(session) == 1
+
+        stats = session.get(CollectorStats, rated_collector.id)
+        session.refresh(stats)
+        assert (stats.rating_sum, stats.rating_count, stats.completed_orders, stats.total_quantity) == (4, 1, 2, 7.5)
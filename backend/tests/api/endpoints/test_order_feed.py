@@ -0,0 +1,111 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models import Order, OrderStatus, User, UserRole
+from app.services.order_feed import GridIndex
+
+
+class TestGridIndex:
+    def test_query_returns_areas_containing_the_point(self):
+        index = GridIndex(cell_size=0.05)
+        near, far = uuid.uuid4(), uuid.uuid4()
+        index.add(near, 10.0, 106.0, 5)
+        index.add(far, 11.0, 107.0, 5)
+
+        matches = index.query(10.01, 106.01)
+        assert set(matches) == {near}
+        assert 0 < matches[near] < 5
+        assert index.query(10.2, 106.2) == {}
+
+    def test_query_across_cell_boundaries(self):
+        # A 10 km radius spans several 0.05° cells: points in neighbouring cells still match.
+        index = GridIndex(cell_size=0.05)
+        key = uuid.uuid4()
+        index.add(key, 10.0, 106.0, 10)
+        for lat, lng in ((10.06, 106.0), (9.94, 106.0), (10.0, 106.07), (10.0, 105.93)):
+            assert key in index.query(lat, lng)
+        assert key not in index.query(10.1, 106.1)
+
+    def test_add_again_moves_the_area_and_remove_drops_it(self):
+        index = GridIndex(cell_size=0.05)
+        key = uuid.uuid4()
+        index.add(key, 10.0, 106.0, 2)
+        index.add(key, 11.0, 107.0, 2)
+        assert index.query(10.0, 106.0) == {}
+        assert key in index.query(11.0, 107.0)
+        assert len(index) == 1
+
+        index.remove(key)
+        assert index.query(11.0, 107.0) == {}
+        assert len(index) == 0
+        index.remove(key)
+
+
+@pytest.fixture
+def feed_collector(session: Session) -> User:
+    user = User(
+        full_name="Feed Collector",
+        phone_number="0966666666",
+        hashed_password="hash",
+        role=UserRole.COLLECTOR,
+    )
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+class TestOrderFeedWebsocket:
+    def test_accepted_order_is_retracted(self, client: TestClient, session: Session, test_user: User, feed_collector: User):
+        order = Order(
+            owner_id=test_user.id,
+            pickup_address="A",
+            location=from_shape(Point(106.001, 10.001), srid=4326),
+            status=OrderStatus.PENDING,
+        )
+        session.add(order)
+        session.commit()
+        token = create_access_token(str(feed_collector.id), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with client.websocket_connect(f"{settings.API_STR}/orders/ws/feed", headers=headers) as websocket:
+            websocket.send_json({"type": "subscribe", "data": {"lat": 10.0, "lng": 106.0, "radius_km": 5}})
+            # Frames are handled in order: once this is answered, the subscription is registered.
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"error": "Unknown message type"}
+
+            response = client.post(f"{settings.API_STR}/orders/{order.id}/accept", json={"note": None}, headers=headers)
+            assert response.status_code == 200
+
+            event = websocket.receive_json()
+            assert event["type"] == "order_retracted"
+            assert event["data"]["id"] == str(order.id)
+            assert event["data"]["distance_km"] < 5
+
+    def test_malformed_frames_keep_socket_open(self, client: TestClient, feed_collector: User):
+        token = create_access_token(str(feed_collector.id), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+        with client.websocket_connect(f"{settings.API_STR}/orders/ws/feed", headers={"Authorization": f"Bearer {token}"}) as websocket:
+            websocket.send_text("not json")
+            assert websocket.receive_json() == {"error": "Invalid message"}
+            websocket.send_json([])
+            assert websocket.receive_json() == {"error": "Invalid message"}
+            websocket.send_json({"type": "subscribe", "data": [10.0, 106.0]})
+            assert websocket.receive_json() == {"error": "Invalid subscription area"}
+            # Still open
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"error": "Unknown message type"}
+
+    def test_feed_requires_collector(self, client: TestClient, test_user: User, test_user_token: str):
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(f"{settings.API_STR}/orders/ws/feed", headers={"Authorization": f"Bearer {test_user_token}"}) as websocket:
+                websocket.receive_json()
@@ -89,3 +89,41 @@ class TestNearbyOrders:
         session.add(o); session.commit()
         resp = authenticated_client.get(f"{settings.API_STR}/orders/nearby", params={"lat": 10.0, "lng": 106.0, "radius_km": 5})
         assert resp.status_code == 403
+
+
+class TestTravelInfoCache:
+    async def test_cached_destinations_are_not_requested_again(self, monkeypatch):
+        from app.services import mapbox, mapbox_cache
+
+        cache = {}
+        requested = []
+
+        async def fake_get_travel_info(cell, order_ids):
+            return {order_id: cache[(cell, order_id)] for order_id in order_ids if (cell, order_id) in cache}
+
+        async def fake_set_travel_info(cell, travel_info):
+            for order_id, info in travel_info.items():
+                cache[(cell, order_id)] = info
+
+        async def fake_matrix(origin, destinations):
+            requested.append(list(destinations))
+            return [{"duration": 60.0 * (i + 1), "distance": 500.0 * (i + 1)} for i in range(len(destinations))]
+
+        monkeypatch.setattr(mapbox_cache, "get_travel_info", fake_get_travel_info)
+        monkeypatch.setattr(mapbox_cache, "set_travel_info", fake_set_travel_info)
+        monkeypatch.setattr(mapbox, "get_travel_info_from_mapbox", fake_matrix)
+
+        order1, order2 = uuid.uuid4(), uuid.uuid4()
+        first = await mapbox.get_travel_info_for_orders((106.0, 10.0), {order1: (106.01, 10.01)})
+        assert first == {order1: {"duration": 60.0, "distance": 500.0}}
+
+        # Same origin cell: only the new order goes to Mapbox, the cached one is merged back in.
+        second = await mapbox.get_travel_info_for_orders(
+            (106.0001, 10.0001), {order1: (106.01, 10.01), order2: (106.02, 10.02)}
+        )
+        assert requested == [[(106.01, 10.01)], [(106.02, 10.02)]]
+        assert second == {order1: {"duration": 60.0, "distance": 500.0}, order2: {"duration": 60.0, "distance": 500.0}}
+
+        # Everything cached: no Mapbox call at all.
+        await mapbox.get_travel_info_for_orders((106.0, 10.0), {order1: (106.01, 10.01), order2: (106.02, 10.02)})
+        assert len(requested) == 2
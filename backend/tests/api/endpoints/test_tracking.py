@@ -0,0 +1,98 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from geoalchemy2.shape import to_shape
+from sqlmodel import Session
+
+from app.api.endpoints.tracking import parse_location
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models import Order, OrderStatus, User, UserRole
+from app.services import location_buffer as location_buffer_module
+from app.services.location_buffer import LocationBuffer, location_buffer
+from tests.conftest import async_engine
+
+
+class TestParseLocation:
+    def test_accepts_numbers_and_numeric_strings(self):
+        assert parse_location('{"lat": 10.5, "lng": 106}') == (10.5, 106.0)
+        assert parse_location('{"lat": "10.1", "lng": "106.2"}') == (10.1, 106.2)
+
+    @pytest.mark.parametrize("frame", [
+        "not json",
+        "[]",
+        '"10.1,106.2"',
+        '{"lat": 10.1}',
+        '{"lat": null, "lng": 106.2}',
+        '{"lat": "north", "lng": 106.2}',
+        '{"lat": 91, "lng": 106.2}',
+        '{"lat": 10.1, "lng": -180.5}',
+        '{"lat": NaN, "lng": 106.2}',
+    ])
+    def test_rejects_bad_frames(self, frame: str):
+        assert parse_location(frame) is None
+
+    def test_buffer_rejects_non_numeric_coordinates(self):
+        buffer = LocationBuffer(interval=60, max_pending=100)
+        with pytest.raises(TypeError):
+            buffer.add(uuid.uuid4(), "10.1", "106.2")
+
+
+def create_collector_order(session: Session, owner: User, phone_number: str) -> tuple[User, Order]:
+    collector = User(
+        full_name="Tracking Collector",
+        phone_number=phone_number,
+        email=f"{phone_number}@example.com",
+        hashed_password=f"hash-{phone_number}",
+        avt_url=settings.DEFAULT_AVATAR_URL,
+        role=UserRole.COLLECTOR,
+    )
+    session.add(collector)
+    session.commit()
+    order = Order(owner_id=owner.id, collector_id=collector.id, pickup_address="A", status=OrderStatus.ACCEPTED)
+    session.add(order)
+    session.commit()
+    session.refresh(collector)
+    session.refresh(order)
+    return collector, order
+
+
+def auth_headers(user: User) -> dict:
+    token = create_access_token(str(user.id), timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestTrackingWebsocket:
+    def test_bad_ping_does_not_block_other_collectors(
+        self, client: TestClient, session: Session, test_user: User, monkeypatch: pytest.MonkeyPatch
+    ):
+        # The buffer writes through its own engine: point it at the test database.
+        monkeypatch.setattr(location_buffer_module, "async_engine", async_engine)
+        bad_collector, bad_order = create_collector_order(session, test_user, "0955555551")
+        good_collector, good_order = create_collector_order(session, test_user, "0955555552")
+
+        with client.websocket_connect(
+            f"{settings.API_STR}/ws/track/{bad_order.id}/collector", headers=auth_headers(bad_collector)
+        ) as websocket:
+            websocket.send_text('{"lat": "north", "lng": "106.2"}')
+            assert websocket.receive_json() == {"error": "Invalid location"}
+            websocket.send_text('{"lat": 95, "lng": 106.2}')
+            assert websocket.receive_json() == {"error": "Invalid location"}
+
+        with client.websocket_connect(
+            f"{settings.API_STR}/ws/track/{good_order.id}/collector", headers=auth_headers(good_collector)
+        ) as websocket:
+            websocket.send_text('{"lat": 10.1, "lng": 106.2}')
+            # Frames are handled in order: once this is answered, the ping above is buffered.
+            websocket.send_text("ping")
+            assert websocket.receive_json() == {"error": "Invalid location"}
+
+        # Flush in the app's event loop, where the buffer's flusher runs (it may already have).
+        client.portal.call(location_buffer.flush)
+
+        session.expire_all()
+        point = to_shape(session.get(User, good_collector.id).current_location)
+        assert (point.x, point.y) == pytest.approx((106.2, 10.1))
+        assert session.get(User, bad_collector.id).current_location is None
@@ -151,3 +151,85 @@ class TestUserEndpoints:
         response = authenticated_client.patch(f"{settings.API_STR}/user/me", json=update_data)
 
         assert response.status_code == 400
+
+    def test_notifications_unread_count_and_read_all(self, authenticated_client: TestClient, test_user: User, session: Session):
+        """Test the paginated inbox, the unread counter and mark-all-read."""
+        from app import crud
+        from app.schemas.notification import NotificationCreate
+
+        for i in range(3):
+            crud.create_notification(session, NotificationCreate(title=f"Title {i}", message="Message"), [test_user.id])
+
+        response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications", params={"limit": 2})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        next_cursor = response.headers["X-Next-Cursor"]
+
+        response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications", params={"limit": 2, "cursor": next_cursor})
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert "X-Next-Cursor" not in response.headers
+
+        response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications/unread-count")
+        assert response.json()["count"] == 3
+
+        response = authenticated_client.post(f"{settings.API_STR}/user/read-all")
+        assert response.status_code == 200
+
+        response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications/unread-count")
+        assert response.json()["count"] == 0
+
+    def test_password_change_revokes_tokens(self, client: TestClient, test_user: User, test_user_token: str):
+        """Test that a password change invalidates the cached auth user and every earlier token."""
+        headers = {"Authorization": f"Bearer {test_user_token}"}
+        assert client.get(f"{settings.API_STR}/user/me", headers=headers).status_code == 200
+
+        password_data = {"old_password": "testpassword", "new_password": "newpassword@@A123"}
+        response = client.patch(f"{settings.API_STR}/user/me/password", json=password_data, headers=headers)
+        assert response.status_code == 200
+
+        response = client.get(f"{settings.API_STR}/user/me", headers=headers)
+        assert response.status_code == 403
+
+        response = client.post(f"{settings.API_STR}/auth/login", json={"phone_number": test_user.phone_number, "password": "newpassword@@A123"})
+        assert response.status_code == 200
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        assert client.get(f"{settings.API_STR}/user/me", headers=headers).status_code == 200
+
+    def test_read_all_keeps_inbox_order_with_global_notifications(self, authenticated_client: TestClient, test_user: User, session: Session):
+        """Test that reading global notifications doesn't move them in the inbox or break its cursors."""
+        from datetime import datetime, timedelta
+        from app import crud
+        from app.models import Notification
+        from app.schemas.notification import NotificationCreate
+
+        now = datetime.now()
+        for i in range(3):
+            session.add(Notification(title=f"Global {i}", message="Message", is_global=True, is_important=True, created_at=now - timedelta(days=i + 1)))
+        session.commit()
+        crud.create_notification(session, NotificationCreate(title="Personal", message="Message"), [test_user.id])
+
+        def inbox_ids():
+            ids, cursor = [], None
+            while True:
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications", params=params)
+                assert response.status_code == 200
+                ids += [n["id"] for n in response.json()]
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    return ids
+
+        before = inbox_ids()
+        assert len(before) == 4 and len(set(before)) == 4
+
+        # Reading one global notification on its own, then everything.
+        response = authenticated_client.post(f"{settings.API_STR}/user/read/{before[2]}")
+        assert response.status_code == 200
+        assert inbox_ids() == before
+
+        response = authenticated_client.post(f"{settings.API_STR}/user/read-all")
+        assert response.status_code == 200
+        assert inbox_ids() == before
+        response = authenticated_client.get(f"{settings.API_STR}/user/me/notifications/unread-count")
+        assert response.json()["count"] == 0
@@ -5,10 +5,15 @@ from typing import Generator
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_async_db, get_read_db, get_async_read_db, get_current_user
+from app.core.db import get_async_database_url
+from app.services import auth_cache, category_cache
 from app.models import User, UserRole, ScrapCategory
 from app.core.security import get_password_hash, create_access_token
 from app.core.config import settings
@@ -24,6 +29,12 @@ engine = create_engine(
     poolclass=StaticPool,  
 )
 
+# Async endpoints open their own connections, so they only see committed test data.
+async_engine = create_async_engine(
+    get_async_database_url(TEST_DATABASE_URL),
+    poolclass=NullPool,
+)
+
 
 
 @pytest.fixture(scope="function")
@@ -41,7 +52,17 @@ def client(session: Session) -> Generator[TestClient, None, None]:
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+
     app.dependency_overrides[get_db] = get_session_override
+    app.dependency_overrides[get_async_db] = get_async_session_override
+    app.dependency_overrides[get_read_db] = get_session_override
+    app.dependency_overrides[get_async_read_db] = get_async_session_override
+    # Each test starts from a fresh database: don't serve a catalog or users cached by a previous test.
+    category_cache.invalidate()
+    auth_cache.clear()
     
     with TestClient(app) as c:
         yield c